@@ -4,8 +4,12 @@ try:
     import Queue as queue
 except ImportError:
     import queue
+
+import os
 import time
 
+from Backtest.BacktestSlot import BacktestSlot
+from Events.EventFanout import EventFanout
 import settings
 
 
@@ -18,66 +22,147 @@ class Backtest(object):
         self, pairs, data_handler, strategy,
         strategy_params, portfolio, execution,
         equity=100000.0, heartbeat=0.0,
-        max_iters=10000000000
+        max_iters=10000000000, csv_dir=None, output_dir=None,
+        execution_params=None, portfolio_params=None, slots=None,
+        signal_cache=None
     ):
         """
-        Initialises the backtest.
+        Initialises the backtest. csv_dir and output_dir default to
+        the CSV_DATA_DIR and OUTPUT_RESULTS_DIR settings.
+        The strategy, portfolio and execution handler are created in
+        a BacktestSlot, with execution_params and portfolio_params as
+        further keyword arguments of the execution handler and the
+        portfolio (such as its risk_limits).
+        Several strategies can instead be backtested together over a
+        single pass of the ticks by giving slots, a list of (strategy,
+        strategy_params, portfolio) or (strategy, strategy_params,
+        portfolio, portfolio_params) tuples, in which case strategy,
+        strategy_params and portfolio are not used. Each slot has its
+        own events queue, execution handler and portfolio, and writes
+        its output into a "slot_NN_Strategy" directory beneath
+        output_dir.
+        With a Backtest.SignalCache, a strategy whose signals over the
+        same tick files and with the same parameters have been cached
+        is not evaluated: its signals are replayed into the portfolio.
+        The signals of the other strategies are cached once the
+        backtest has handled every tick.
         """
         self.pairs = pairs
-        self.events = queue.Queue()
-        self.csv_dir = settings.CSV_DATA_DIR
-        self.ticker = data_handler(self.pairs, self.events, self.csv_dir)
-        self.strategy_params = strategy_params
-        self.strategy = strategy(
-            self.pairs, self.events, **self.strategy_params
-        )
+        self.csv_dir = csv_dir or settings.CSV_DATA_DIR
+        self.output_dir = output_dir or settings.OUTPUT_RESULTS_DIR
         self.equity = equity
         self.heartbeat = heartbeat
         self.max_iters = max_iters
-        self.portfolio = portfolio(
-            self.ticker, self.events, equity=self.equity, backtest=True
+        self.signal_cache = signal_cache
+        self.multiple = slots is not None
+        if self.multiple:
+            queues = [queue.Queue() for _ in slots]
+            self.fanout = EventFanout(queues)
+            self.ticker = data_handler(self.pairs, self.fanout, self.csv_dir)
+            self.slots = [
+                self._create_slot(
+                    slot[0], slot[1], slot[2], execution, execution_params,
+                    slot[3] if len(slot) > 3 else portfolio_params,
+                    os.path.join(self.output_dir, "slot_%02d_%s" % (i, slot[0].__name__)),
+                    events
+                )
+                for i, (slot, events) in enumerate(zip(slots, queues))
+            ]
+        else:
+            events = queue.Queue()
+            self.ticker = data_handler(self.pairs, events, self.csv_dir)
+            self.slots = [self._create_slot(
+                strategy, strategy_params, portfolio, execution, execution_params,
+                portfolio_params, self.output_dir, events
+            )]
+        # The components of the first slot
+        slot = self.slots[0]
+        self.events = slot.events
+        self.strategy_params = slot.strategy_params
+        self.strategy = slot.strategy
+        self.bar_aggregator = slot.bar_aggregator
+        self.execution_params = slot.execution_params
+        self.reports_fills = slot.reports_fills
+        self.execution = slot.execution
+        self.portfolio_params = slot.portfolio_params
+        self.portfolio = slot.portfolio
+        self.event_loop = slot.event_loop
+
+    def _create_slot(self, strategy, strategy_params, portfolio, execution,
+                     execution_params, portfolio_params, output_dir, events):
+        cache_key = None
+        if self.signal_cache is not None:
+            cache_key = self.signal_cache.key(self.csv_dir, self.pairs, strategy, strategy_params)
+        return BacktestSlot(
+            self.pairs, self.ticker, strategy, strategy_params, portfolio,
+            execution, self.equity, output_dir, execution_params,
+            portfolio_params, events, self.signal_cache, cache_key
         )
-        self.execution = execution()
 
     def _run_backtest(self):
         """
-        Carries out an infinite while loop that polls the
-        events queue and directs each event to either the
-        strategy component of the execution handler. The
-        loop will then pause for "heartbeat" seconds and
-        continue until the maximum number of iterations is
-        exceeded.
+        Drains the events queue, directing each event to either
+        the strategy component, the portfolio or the execution
+        handler, and then streams the next tick. The loop pauses
+        for "heartbeat" seconds after each tick and continues
+        until the data is exhausted or the maximum number of
+        iterations is exceeded.
         """
         print("Running Backtest...")
+        if self.multiple:
+            self._run_slots()
+            for slot in self.slots:
+                print(slot.event_loop.report())
+        else:
+            self.event_loop.run_backtest(self.ticker, self.max_iters, self.heartbeat)
+            print(self.event_loop.report())
+
+    def _run_slots(self):
+        """
+        As EventLoop.run_backtest, but drains the events queue of
+        every slot before each tick is streamed to all of them. A
+        slot whose event loop was stopped is retired and receives no
+        further ticks.
+        """
+        active = list(self.slots)
         iters = 0
-        while iters < self.max_iters and self.ticker.continue_backtest:
-            try:
-                event = self.events.get(False)
-            except queue.Empty:
-                self.ticker.stream_next_tick()
-            else:
-                if event is not None:
-                    if event.type == 'TICK':
-                        self.strategy.calculate_signals(event)
-                    elif event.type == 'SIGNAL':
-                        self.portfolio.execute_signal(event)
-                        self.portfolio.update_portfolio(event)
-                    elif event.type == 'ORDER':
-                        self.execution.execute_order(event)
-            time.sleep(self.heartbeat)
+        while active and iters < self.max_iters and self.ticker.continue_backtest:
+            for slot in list(active):
+                count = slot.event_loop.drain()
+                if count is None:
+                    slot.retired = True
+                    active.remove(slot)
+                    self.fanout.queues.remove(slot.events)
+                else:
+                    iters += count
+            if not active:
+                break
+            self.ticker.stream_next_tick()
             iters += 1
+            if self.heartbeat:
+                time.sleep(self.heartbeat)
 
     def _output_performance(self):
         """
-        Outputs the strategy performance from the backtest.
+        Outputs the strategy performance from the backtest, or
+        a list of the performance of every slot.
         """
         print("Calculating Performance Metrics...")
-        self.portfolio.output_results()
+        if self.multiple:
+            return [slot.portfolio.output_results() for slot in self.slots]
+        return self.portfolio.output_results()
 
     def simulate_trading(self):
         """
         Simulates the backtest and outputs portfolio performance.
+        Returns the maximum drawdown and drawdown duration, or a
+        list of them in the order of the slots.
         """
         self._run_backtest()
-        self._output_performance()
-        print("Backtest complete.")
\ No newline at end of file
+        if not self.ticker.continue_backtest:
+            for slot in self.slots:
+                if not slot.retired:
+                    slot.store_signals()
+        results = self._output_performance()
+        print("Backtest complete.")
+        return results
\ No newline at end of file
@@ -0,0 +1,95 @@
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from Backtest.SignalCache import SignalRecorder, SignalReplay
+from Events.Event import EventType
+from Events.EventLoop import EventLoop
+from Price.BarAggregator import BarAggregator
+
+
+class BacktestSlot(object):
+    """
+    The components of one strategy and portfolio within a Backtest:
+    its own events queue, strategy, bar aggregator, execution handler,
+    portfolio and the event loop between them. Slots share only the
+    price handler, whose prices dictionary they read.
+    An execution handler which reports fills (such as
+    Execution.SimulatedBroker) is created with the pairs, the events
+    queue and execution_params, sees every tick before the strategy
+    does, and the portfolio then waits for its fills instead of
+    filling orders itself.
+    A strategy with timeframes (in seconds) handles the BAR events
+    of a Price.BarAggregator for those timeframes instead of ticks.
+    With a SignalCache and the key of this strategy and its data,
+    the strategy's signals are replayed from the cache if it holds
+    them, instead of the strategy handling ticks and bars, and are
+    otherwise recorded so that store_signals can add them to it.
+    """
+
+    def __init__(
+            self, pairs, ticker, strategy, strategy_params, portfolio,
+            execution, equity, output_dir, execution_params=None,
+            portfolio_params=None, events=None, signal_cache=None,
+            cache_key=None):
+        self.pairs = pairs
+        self.events = events if events is not None else queue.Queue()
+        self.output_dir = output_dir
+        self.strategy_params = strategy_params
+        self.strategy = strategy(pairs, self.events, **strategy_params)
+        self.signal_cache = signal_cache
+        self.cache_key = cache_key
+        cached = signal_cache.get(cache_key) if signal_cache is not None else None
+        self.replay = SignalReplay(cached, self.events) if cached is not None else None
+        self.recorder = SignalRecorder() if signal_cache is not None and cached is None else None
+        timeframes = getattr(self.strategy, "timeframes", ())
+        if timeframes and self.replay is None:
+            self.bar_aggregator = BarAggregator(pairs, self.events, timeframes)
+        else:
+            self.bar_aggregator = None
+        self.execution_params = execution_params or {}
+        self.reports_fills = getattr(execution, "reports_fills", False)
+        if self.reports_fills:
+            self.execution = execution(pairs, self.events, **self.execution_params)
+        else:
+            self.execution = execution(**self.execution_params)
+        self.portfolio_params = portfolio_params or {}
+        self.portfolio = portfolio(
+            ticker, self.events, equity=equity, backtest=True,
+            output_dir=output_dir, wait_for_fills=self.reports_fills,
+            **self.portfolio_params
+        )
+        self.event_loop = self.create_event_loop()
+        # Set when the slot's event loop was stopped before the end
+        self.retired = False
+
+    def create_event_loop(self):
+        if self.replay is not None:
+            tick_handlers = [self.replay.calculate_signals, self.portfolio.update_portfolio]
+        elif self.bar_aggregator is not None:
+            tick_handlers = [self.bar_aggregator.on_tick, self.portfolio.update_portfolio]
+        else:
+            tick_handlers = [self.strategy.calculate_signals, self.portfolio.update_portfolio]
+        signal_handlers = [self.portfolio.execute_signal, self.portfolio.update_portfolio]
+        if self.recorder is not None:
+            tick_handlers.insert(0, self.recorder.on_tick)
+            signal_handlers.insert(0, self.recorder.on_signal)
+        if self.reports_fills:
+            tick_handlers.insert(0, self.execution.on_tick)
+        return EventLoop(self.events, {
+            EventType.TICK: tick_handlers,
+            EventType.BAR: [self.strategy.calculate_signals],
+            EventType.SIGNAL: signal_handlers,
+            EventType.ORDER: [self.execution.execute_order],
+            EventType.FILL: [self.portfolio.execute_fill]
+        })
+
+    def store_signals(self):
+        """
+        Adds the recorded signals to the signal cache, if they were
+        recorded. Only call this once every tick has been handled.
+        """
+        if self.recorder is not None:
+            self.signal_cache.put(self.cache_key, self.recorder.records())
+            self.recorder = None
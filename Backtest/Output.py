@@ -1,6 +1,3 @@
-import os
-
-import pandas as pd
 import matplotlib
 
 try:
@@ -11,6 +8,7 @@ except:
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from Portfolio.EquityRecorder import EquityRecorder
 import settings
 
 if __name__ == "__main__":
@@ -23,10 +21,7 @@ if __name__ == "__main__":
     sns.set_palette("deep", desat=.6)
     sns.set_context(rc={"figure.figsize": (8, 4)})
 
-    equity_file = os.path.join(settings.OUTPUT_RESULTS_DIR, "equity.csv")
-    equity = pd.read_csv(
-        equity_file, parse_dates=True, header=0, index_col=0
-    )
+    equity = EquityRecorder.load(settings.OUTPUT_RESULTS_DIR)
 
     # Plot three charts: Equity curve, period returns, drawdowns
     fig = plt.figure()
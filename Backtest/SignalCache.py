@@ -0,0 +1,158 @@
+import glob
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+
+from Events.SignalEvent import SignalEvent
+from Price import TickCache
+import settings
+
+# The tick (counted from 1) after which each signal was emitted
+SIGNAL_DTYPE = np.dtype([
+    ("tick", "i8"), ("time", "M8[us]"), ("instrument", "U7"),
+    ("side", "U4"), ("order_type", "U8")
+])
+
+
+class SignalCache(object):
+    """
+    An on-disk cache of the signals that a strategy emits over a
+    backtest, so that a backtest which only changes the portfolio
+    (e.g. its risk_per_trade, home_currency or risk_limits) can
+    replay them instead of evaluating the strategy again.
+    Entries are keyed by a hash of the pairs, the real path, size
+    and modification time of every tick file (as the tick cache checks
+    its freshness), the strategy class, its "version" attribute
+    and source code, and the strategy parameters. Each entry is one
+    .npy record array of SIGNAL_DTYPE. Reading an entry marks it as
+    recently used, and the least recently used entries are removed
+    once the cache holds more than max_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir or settings.SIGNAL_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    @staticmethod
+    def key(csv_dir, pairs, strategy, strategy_params):
+        digest = hashlib.sha256()
+        for pair in pairs:
+            digest.update(pair.encode("ascii"))
+            for _, path in TickCache.pair_files(csv_dir, pair):
+                stat = os.stat(path)
+                digest.update(("%s,%d,%d;" % (
+                    os.path.realpath(path), stat.st_size, stat.st_mtime_ns
+                )).encode("utf-8"))
+        digest.update(("%s.%s:%s" % (
+            strategy.__module__, strategy.__name__, getattr(strategy, "version", None)
+        )).encode("utf-8"))
+        try:
+            digest.update(inspect.getsource(strategy).encode("utf-8"))
+        except (OSError, TypeError):
+            pass
+        digest.update(json.dumps(strategy_params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, "%s.npy" % key)
+
+    def get(self, key):
+        """
+        Returns the cached signals of key, or None.
+        """
+        path = self.path(key)
+        try:
+            signals = np.load(path)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return signals
+
+    def put(self, key, signals):
+        path = self.path(key)
+        temp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(temp_path, "wb") as f:
+            np.save(f, signals)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache
+        holds no more than max_bytes.
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.npy")):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+class SignalRecorder(object):
+    """
+    Records the signals of a strategy, with the number of ticks
+    seen when each one was emitted. on_tick must handle every tick
+    before the strategy does.
+    """
+
+    def __init__(self):
+        self.ticks = 0
+        self.time = None
+        self.signals = []
+
+    def on_tick(self, event):
+        self.ticks += 1
+        self.time = event.time
+
+    def on_signal(self, event):
+        self.signals.append((
+            self.ticks, self.time, event.instrument, event.side, event.order_type
+        ))
+
+    def records(self):
+        return np.array(self.signals, dtype=SIGNAL_DTYPE)
+
+
+class SignalReplay(object):
+    """
+    Stands in for a strategy by placing recorded signals onto the
+    events queue after the same ticks as they were emitted.
+    """
+
+    def __init__(self, signals, events):
+        self.events = events
+        self.ticks = 0
+        self.next = 0
+        self.signal_ticks = signals["tick"].tolist()
+        self.signals = list(zip(
+            signals["instrument"].tolist(), signals["order_type"].tolist(),
+            signals["side"].tolist()
+        ))
+
+    def calculate_signals(self, event):
+        self.ticks += 1
+        signal_ticks = self.signal_ticks
+        while self.next < len(signal_ticks) and signal_ticks[self.next] == self.ticks:
+            instrument, order_type, side = self.signals[self.next]
+            self.events.put(SignalEvent(instrument, order_type, side, event.origin_ns))
+            self.next += 1
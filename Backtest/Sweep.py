@@ -0,0 +1,99 @@
+from __future__ import print_function
+
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import pandas as pd
+
+from Backtest.Backtest import Backtest
+from Price import TickCache
+import settings
+
+
+def grid(**param_values):
+    """
+    Returns a list of strategy parameter dictionaries covering
+    every combination of the given values, e.g.
+    grid(short_window=[20, 40], long_window=[200, 400]).
+    """
+    names = sorted(param_values)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*[param_values[n] for n in names])
+    ]
+
+
+def random_grid(samples, seed=None, **param_values):
+    """
+    Returns a list of samples strategy parameter dictionaries with
+    each parameter drawn uniformly from its list of values.
+    """
+    rng = random.Random(seed)
+    names = sorted(param_values)
+    return [
+        {n: rng.choice(param_values[n]) for n in names}
+        for _ in range(samples)
+    ]
+
+
+def _run_single(run_id, pairs, data_handler, strategy, strategy_params,
+                portfolio, execution, equity, csv_dir, output_dir,
+                execution_params, portfolio_params):
+    """
+    Runs one backtest in a worker process and returns its row
+    of the results table.
+    """
+    run_dir = os.path.join(output_dir, "run_%04d" % run_id)
+    backtest = Backtest(
+        pairs, data_handler, strategy, strategy_params,
+        portfolio, execution, equity=equity,
+        csv_dir=csv_dir, output_dir=run_dir,
+        execution_params=execution_params, portfolio_params=portfolio_params
+    )
+    max_dd, dd_duration = backtest.simulate_trading()
+    row = {
+        "run": run_id,
+        "balance": backtest.portfolio.balance,
+        "max_drawdown": max_dd,
+        "drawdown_duration": dd_duration,
+        "output_dir": run_dir
+    }
+    row.update(strategy_params)
+    return row
+
+
+def run_sweep(
+        pairs, data_handler, strategy, param_sets,
+        portfolio, execution, equity=Decimal("100000.00"),
+        csv_dir=None, output_dir=None, max_workers=None,
+        execution_params=None, portfolio_params=None
+):
+    """
+    Runs a backtest for every strategy parameter dictionary in
+    param_sets over a process pool and returns a DataFrame with
+    the final balance, maximum drawdown and drawdown duration of
+    each run. Every run writes its output into its own
+    "run_NNNN" directory beneath output_dir.
+    The tick cache is built once before the workers start, so
+    each worker memory-maps the same cached tick data.
+    execution_params and portfolio_params are passed on to every
+    run's Backtest.
+    """
+    csv_dir = csv_dir or settings.CSV_DATA_DIR
+    output_dir = output_dir or settings.OUTPUT_RESULTS_DIR
+    TickCache.build_cache(csv_dir, pairs, settings.TICK_CACHE_DIR)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _run_single, run_id, pairs, data_handler, strategy,
+                params, portfolio, execution, equity, csv_dir, output_dir,
+                execution_params, portfolio_params
+            )
+            for run_id, params in enumerate(param_sets)
+        ]
+        rows = [f.result() for f in futures]
+    return pd.DataFrame(rows).set_index("run")
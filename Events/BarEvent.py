@@ -0,0 +1,45 @@
+from Events.Event import Event, EventType
+
+
+class BarEvent(Event):
+    """
+    A closed OHLC bar of bid and ask prices for one pair and
+    timeframe (in seconds). time is the start of the bar and volume
+    the number of ticks in it. bid and ask are the closing prices,
+    so that a bar can be handled like a tick.
+    """
+    __slots__ = (
+        "instrument", "timeframe", "time",
+        "open_bid", "high_bid", "low_bid", "close_bid",
+        "open_ask", "high_ask", "low_ask", "close_ask",
+        "volume", "origin_ns"
+    )
+    type = EventType.BAR
+
+    def __init__(
+            self, instrument, timeframe, time,
+            open_bid, high_bid, low_bid, close_bid,
+            open_ask, high_ask, low_ask, close_ask,
+            volume, origin_ns=0
+    ):
+        self.instrument = instrument
+        self.timeframe = timeframe
+        self.time = time
+        self.open_bid = open_bid
+        self.high_bid = high_bid
+        self.low_bid = low_bid
+        self.close_bid = close_bid
+        self.open_ask = open_ask
+        self.high_ask = high_ask
+        self.low_ask = low_ask
+        self.close_ask = close_ask
+        self.volume = volume
+        self.origin_ns = origin_ns
+
+    @property
+    def bid(self):
+        return self.close_bid
+
+    @property
+    def ask(self):
+        return self.close_ask
@@ -1,4 +1,25 @@
-class Event:
-    pass
+class EventType(object):
+    """
+    The discriminators of the event types. They are interned
+    strings, so the dispatch loops can compare them cheaply while
+    existing "event.type == 'TICK'" checks keep working.
+    """
+    TICK = 'TICK'
+    SIGNAL = 'SIGNAL'
+    ORDER = 'ORDER'
+    FILL = 'FILL'
+    BAR = 'BAR'
 
 
+class Event(object):
+    """
+    Base class of all events. Events are created for every tick, so
+    subclasses declare __slots__ to avoid a per-instance __dict__ and
+    store their type as a class attribute.
+    origin_ns is the monotonic time (in nanoseconds) at which the
+    tick that led to the event arrived, or 0 when ticks are not
+    being stamped, and is used to measure latency through the
+    pipeline (see Metrics.Latency).
+    """
+    __slots__ = ()
+    type = None
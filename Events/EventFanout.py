@@ -0,0 +1,14 @@
+class EventFanout(object):
+    """
+    Stands in for the events queue of a price handler which is shared
+    by several event loops: each event put onto it is put onto every
+    one of their queues, so that the ticks are only read and decoded
+    once.
+    """
+
+    def __init__(self, queues):
+        self.queues = queues
+
+    def put(self, event):
+        for events in self.queues:
+            events.put(event)
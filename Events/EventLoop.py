@@ -0,0 +1,194 @@
+from __future__ import print_function
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+import time
+
+from Events.Event import EventType
+
+# Placed onto the events queue to stop a running EventLoop
+SHUTDOWN = object()
+
+
+class EventLoop(object):
+    """
+    Dispatches events from an events queue to the handlers registered
+    for each event type. It is shared by live trading and backtesting.
+    Live trading blocks on the queue (with a timeout) instead of
+    polling it, so no CPU is used between ticks, and every wake-up
+    drains all pending events in one batch. Backtesting drains the
+    queue and then asks the price handler for the next tick, without
+    sleeping between events.
+    The time spent waiting for events (idle) and handling them (busy)
+    is recorded so that it can be reported.
+    If a Metrics.Latency.LatencyRecorder is given, every dispatch also
+    records per-stage latencies and the queue depth. Without one the
+    uninstrumented dispatch method is used, so there is no overhead.
+    """
+
+    def __init__(self, events, handlers, timeout=1.0, latency=None):
+        """
+        :param events: the events queue
+        :param handlers: a dictionary of event type to a list of
+            callables, each called with the event in turn
+        :param timeout: seconds to block for an event before checking
+            whether the loop has been stopped
+        :param latency: an optional LatencyRecorder
+        """
+        self.events = events
+        self.handlers = {t: tuple(h) for t, h in handlers.items()}
+        self.timeout = timeout
+        self.running = False
+        self.dispatched = 0
+        self.busy_time = 0.0
+        self.idle_time = 0.0
+        self.latency = latency
+        if latency is not None:
+            self.stages = {
+                t: tuple("%s.%s" % (t, self._handler_name(h)) for h in hs)
+                for t, hs in self.handlers.items()
+            }
+            self.dispatch = self._dispatch_instrumented
+
+    @staticmethod
+    def _handler_name(handler):
+        name = getattr(handler, "__qualname__", repr(handler))
+        return name.split(".<locals>.")[-1]
+
+    def dispatch(self, event):
+        for handler in self.handlers.get(event.type, ()):
+            handler(event)
+        self.dispatched += 1
+
+    def _dispatch_instrumented(self, event):
+        """
+        Dispatches an event, recording the time since its tick
+        arrived, the time spent in each handler and the depth
+        of the queue.
+        """
+        latency = self.latency
+        event_type = event.type
+        origin_ns = event.origin_ns
+        start = time.monotonic_ns()
+        if origin_ns:
+            latency.record(event_type + ".wait", start - origin_ns)
+        handlers = self.handlers.get(event_type, ())
+        stages = self.stages.get(event_type, ())
+        for handler, stage in zip(handlers, stages):
+            handler(event)
+            end = time.monotonic_ns()
+            latency.record(stage, end - start)
+            start = end
+        if origin_ns:
+            if event_type == EventType.ORDER:
+                latency.record("tick_to_order", start - origin_ns)
+            elif event_type == EventType.FILL:
+                latency.record("tick_to_fill", start - origin_ns)
+        latency.record_depth(self.events.qsize())
+        self.dispatched += 1
+
+    def drain(self):
+        """
+        Dispatches every event currently on the queue, including
+        those placed on it by the handlers, without blocking.
+        Returns the number of events dispatched, or None if the
+        shutdown sentinel was reached with nothing queued behind it.
+        """
+        count = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    event = self.events.get_nowait()
+                except queue.Empty:
+                    return count
+                if event is SHUTDOWN:
+                    if self._stop_deferred():
+                        continue
+                    self.running = False
+                    return None
+                if event is not None:
+                    self.dispatch(event)
+                    count += 1
+        finally:
+            self.busy_time += time.perf_counter() - start
+
+    def run(self):
+        """
+        Blocks on the events queue and dispatches events as they
+        arrive until stop is called.
+        """
+        self.running = True
+        while self.running:
+            start = time.perf_counter()
+            try:
+                event = self.events.get(True, self.timeout)
+            except queue.Empty:
+                self.idle_time += time.perf_counter() - start
+                if self.latency is not None:
+                    self.latency.maybe_report()
+                continue
+            self.idle_time += time.perf_counter() - start
+            if event is SHUTDOWN:
+                if not self._stop_deferred():
+                    break
+                event = None
+            if event is not None:
+                start = time.perf_counter()
+                self.dispatch(event)
+                self.busy_time += time.perf_counter() - start
+            self.drain()
+            if self.latency is not None:
+                self.latency.maybe_report()
+        self.running = False
+        print(self.report())
+        if self.latency is not None:
+            print(self.latency.report())
+
+    def run_backtest(self, ticker, max_iters, heartbeat=0.0):
+        """
+        Drains the events queue and streams the next tick from the
+        ticker, until the ticker is exhausted or max_iters events and
+        ticks have been processed. heartbeat seconds are slept after
+        each tick rather than after each event.
+        """
+        self.running = True
+        iters = 0
+        while self.running and iters < max_iters and ticker.continue_backtest:
+            count = self.drain()
+            if count is None:
+                break
+            ticker.stream_next_tick()
+            iters += count + 1
+            if heartbeat:
+                time.sleep(heartbeat)
+        self.running = False
+
+    def stop(self):
+        """
+        Places the shutdown sentinel onto the queue, so that the
+        loop stops once the queue is empty: the events ahead of it,
+        and those that the handlers derive from them, such as the
+        signals and orders of the last ticks, are handled first.
+        """
+        self.events.put(SHUTDOWN)
+
+    def _stop_deferred(self):
+        """
+        Called on reaching the shutdown sentinel. If events were
+        queued behind it, places it back at the end of the queue
+        and returns True.
+        """
+        if self.events.qsize() > 0:
+            self.events.put(SHUTDOWN)
+            return True
+        return False
+
+    def report(self):
+        total = self.busy_time + self.idle_time
+        busy = 100.0 * self.busy_time / total if total else 0.0
+        return "Events dispatched: %d, busy: %.3fs, idle: %.3fs (%.1f%% busy)" % (
+            self.dispatched, self.busy_time, self.idle_time, busy
+        )
@@ -0,0 +1,28 @@
+from Events.Event import Event, EventType
+
+
+class FillEvent(Event):
+    """
+    The result of executing an order. status is "FILLED" when the
+    units were filled at price, "PARTIALLY_FILLED" when they were
+    filled at price but the rest of the order is still pending,
+    otherwise e.g. "REJECTED" or "ERROR" with the reason in message.
+    """
+    __slots__ = (
+        "instrument", "units", "side", "price", "status",
+        "order_id", "message", "origin_ns"
+    )
+    type = EventType.FILL
+
+    def __init__(
+            self, instrument, units, side, price, status,
+            order_id=None, message=None, origin_ns=0
+    ):
+        self.instrument = instrument
+        self.units = units
+        self.side = side
+        self.price = price
+        self.status = status
+        self.order_id = order_id
+        self.message = message
+        self.origin_ns = origin_ns
@@ -1,11 +1,13 @@
-from Events.Event import Event
+from Events.Event import Event, EventType
 
 
 class OrderEvent(Event):
-    def __init__(self, instrument, units, order_type, side):
-        self.type = 'ORDER'
+    __slots__ = ("instrument", "units", "order_type", "side", "origin_ns")
+    type = EventType.ORDER
+
+    def __init__(self, instrument, units, order_type, side, origin_ns=0):
         self.instrument = instrument
         self.units = units
         self.order_type = order_type
         self.side = side
-
+        self.origin_ns = origin_ns
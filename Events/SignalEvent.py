@@ -1,9 +1,12 @@
-from Events.Event import Event
+from Events.Event import Event, EventType
 
 
 class SignalEvent(Event):
-    def __init__(self, instrument, order_type, side):
-        self.type = 'SIGNAL'
+    __slots__ = ("instrument", "order_type", "side", "origin_ns")
+    type = EventType.SIGNAL
+
+    def __init__(self, instrument, order_type, side, origin_ns=0):
         self.instrument = instrument
         self.order_type = order_type
         self.side = side
+        self.origin_ns = origin_ns
@@ -1,10 +1,20 @@
-from Events.Event import Event
+from Events.Event import Event, EventType
 
 
 class TickEvent(Event):
-    def __init__(self, instrument, time, bid, ask):
-        self.type = 'TICK'
+    """
+    bid_volume and ask_volume are the quoted volumes, when the
+    price source has them (e.g. the AskVolume and BidVolume
+    columns of the historic tick files).
+    """
+    __slots__ = ("instrument", "time", "bid", "ask", "origin_ns", "bid_volume", "ask_volume")
+    type = EventType.TICK
+
+    def __init__(self, instrument, time, bid, ask, origin_ns=0, bid_volume=None, ask_volume=None):
         self.instrument = instrument
         self.time = time
         self.bid = bid
         self.ask = ask
+        self.origin_ns = origin_ns
+        self.bid_volume = bid_volume
+        self.ask_volume = ask_volume
@@ -0,0 +1,160 @@
+from __future__ import print_function
+
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+from oandapyV20.contrib.requests import MarketOrderRequest
+
+from Events.FillEvent import FillEvent
+
+
+class AsyncExecution(object):
+    """
+    An execution handler which does not block the trading loop.
+    execute_order only records the order; orders for the same
+    instrument that arrive within coalesce_window seconds of each
+    other are netted into a single market order, which is then
+    submitted by a pool of worker threads sharing one keep-alive
+    requests session. The outcome of every submitted order is placed
+    onto the events queue as a FillEvent.
+    base_url defaults to "https://<domain>" and may point at a local
+    mock of the OANDA REST API.
+    """
+
+    def __init__(
+            self, domain, access_token, account_id, events,
+            max_workers=4, coalesce_window=0.05, base_url=None,
+            timeout=10.0
+    ):
+        self.domain = domain
+        self.access_token = access_token
+        self.account_id = account_id
+        self.events = events
+        self.coalesce_window = coalesce_window
+        self.base_url = base_url or "https://%s" % domain
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_workers
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": "Bearer %s" % access_token,
+            "Content-Type": "application/json"
+        })
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # instrument -> [net signed units, origin_ns of the first order]
+        self.pending = {}
+        self.timers = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def multiplier(side):
+        if side == "buy":
+            return 1
+        elif side == "sell":
+            return -1
+        else:
+            return 0
+
+    def execute_order(self, event):
+        if event.order_type != "market":
+            return
+        units = event.units * self.multiplier(event.side)
+        with self.lock:
+            if event.instrument in self.pending:
+                self.pending[event.instrument][0] += units
+                return
+            self.pending[event.instrument] = [units, event.origin_ns]
+            if self.coalesce_window > 0:
+                timer = threading.Timer(self.coalesce_window, self._flush, [event.instrument])
+                timer.daemon = True
+                self.timers[event.instrument] = timer
+                timer.start()
+                return
+        self._flush(event.instrument)
+
+    def _flush(self, instrument):
+        """
+        Submits the net order accumulated for an instrument.
+        """
+        with self.lock:
+            self.timers.pop(instrument, None)
+            units, origin_ns = self.pending.pop(instrument, (0, 0))
+        if units != 0:
+            future = self.executor.submit(self._submit, instrument, units, origin_ns)
+            future.add_done_callback(functools.partial(self._submitted, instrument, units, origin_ns))
+
+    def _submitted(self, instrument, units, origin_ns, future):
+        """
+        Reports an order whose submission failed unexpectedly (such as
+        while creating its FillEvent) as an "ERROR" FillEvent, so that
+        a portfolio waiting for its fill does not lose track of it.
+        """
+        if future.cancelled():
+            error = "Order submission was cancelled"
+        elif future.exception() is not None:
+            error = repr(future.exception())
+        else:
+            return
+        print("Caught exception when submitting order for %s %s\n%s" % (units, instrument, error))
+        self.events.put(FillEvent(
+            instrument, abs(units), "buy" if units > 0 else "sell", None, "ERROR",
+            message=error, origin_ns=origin_ns
+        ))
+
+    def _submit(self, instrument, units, origin_ns):
+        side = "buy" if units > 0 else "sell"
+        market_order = MarketOrderRequest(instrument=instrument, units=units)
+        url = "%s/v3/accounts/%s/orders" % (self.base_url, self.account_id)
+        try:
+            response = self.session.post(url, json=market_order.data, timeout=self.timeout)
+            rv = response.json()
+        except (requests.RequestException, ValueError) as e:
+            fill = FillEvent(
+                instrument, abs(units), side, None, "ERROR",
+                message=str(e), origin_ns=origin_ns
+            )
+        else:
+            fill = self._create_fill(instrument, units, side, response.status_code, rv, origin_ns)
+        self.events.put(fill)
+
+    @staticmethod
+    def _create_fill(instrument, units, side, status_code, rv, origin_ns):
+        """
+        Converts an OANDA order create response into a FillEvent.
+        """
+        transaction = rv.get("orderFillTransaction")
+        if status_code == 201 and transaction is not None:
+            return FillEvent(
+                instrument, abs(int(transaction.get("units", units))), side,
+                Decimal(transaction["price"]), "FILLED",
+                order_id=transaction.get("orderID", transaction.get("id")),
+                origin_ns=origin_ns
+            )
+        cancel = rv.get("orderCancelTransaction") or rv.get("orderRejectTransaction") or {}
+        message = cancel.get("reason") or rv.get("errorMessage") or "HTTP %s" % status_code
+        return FillEvent(
+            instrument, abs(units), side, None, "REJECTED",
+            order_id=cancel.get("orderID"), message=message, origin_ns=origin_ns
+        )
+
+    def close(self):
+        """
+        Submits any orders still waiting in a coalescing window,
+        waits for the submitted orders to complete and closes the
+        connection pool.
+        """
+        with self.lock:
+            timers = list(self.timers.items())
+        for instrument, timer in timers:
+            timer.cancel()
+            self._flush(instrument)
+        self.executor.shutdown(wait=True)
+        self.session.close()
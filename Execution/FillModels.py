@@ -0,0 +1,79 @@
+import numpy as np
+
+# Latencies are in microseconds and prices in integer units of
+# 0.00001 (see Portfolio.FixedPointPosition), so that the models
+# can be applied to whole arrays of pending orders at once.
+
+
+class ConstantLatency(object):
+    """
+    Every order reaches the simulated broker delay_ms milliseconds
+    after the tick on which it was placed.
+    """
+
+    def __init__(self, delay_ms=0.0):
+        self.delay_us = int(round(delay_ms * 1000))
+
+    def delay(self, n):
+        return np.full(n, self.delay_us, dtype=np.int64)
+
+
+class RandomLatency(object):
+    """
+    Order latencies drawn from a normal distribution with the given
+    mean and standard deviation in milliseconds, truncated at zero.
+    """
+
+    def __init__(self, mean_ms, std_ms, seed=None):
+        self.mean_us = mean_ms * 1000.0
+        self.std_us = std_ms * 1000.0
+        self.rng = np.random.RandomState(seed)
+
+    def delay(self, n):
+        delays = self.rng.normal(self.mean_us, self.std_us, n)
+        return np.maximum(np.rint(delays), 0).astype(np.int64)
+
+
+class SpreadWidening(object):
+    """
+    Widens the quoted spread around its mid price by multiplier,
+    plus extra_pips (in 0.00001 units) on each side, to model the
+    wider prices a broker quotes to a simulated account.
+    The default leaves the quoted prices unchanged.
+    """
+
+    def __init__(self, multiplier=1.0, extra_pips=0):
+        self.multiplier = multiplier
+        self.extra_pips = extra_pips
+
+    def widen(self, bid, ask):
+        half = int(round((ask - bid) * (self.multiplier - 1.0) / 2.0)) + self.extra_pips
+        return bid - half, ask + half
+
+
+class FixedSlippage(object):
+    """
+    Every fill is pips (in 0.00001 units) worse than the quoted price.
+    """
+
+    def __init__(self, pips=0):
+        self.pips = pips
+
+    def slippage(self, units, available):
+        return np.full(len(units), self.pips, dtype=np.int64)
+
+
+class VolumeSlippage(object):
+    """
+    Slippage proportional to the share of the quoted volume that a
+    fill takes: taking all of it costs impact_pips (in 0.00001 units).
+    When the tick has no volume the fill is not slipped.
+    """
+
+    def __init__(self, impact_pips=10):
+        self.impact_pips = impact_pips
+
+    def slippage(self, units, available):
+        if available is None or available <= 0:
+            return np.zeros(len(units), dtype=np.int64)
+        return np.rint(self.impact_pips * units / float(available)).astype(np.int64)
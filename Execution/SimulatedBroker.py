@@ -0,0 +1,156 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+
+from Events.FillEvent import FillEvent
+from Execution.FillModels import ConstantLatency, SpreadWidening, FixedSlippage
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+PRICE_DECIMALS = 5
+
+
+class SimulatedBroker(object):
+    """
+    A simulated broker for backtests. Orders are not filled when they
+    are placed but held as pending and filled against the subsequent
+    ticks of their pair, once the latency model's delay has passed.
+    Each tick's prices are widened by the spread model, buys fill at
+    the ask and sells at the bid plus the slippage model's price
+    impact, and the units filled on a tick are limited by a share
+    (participation) of the tick's AskVolume or BidVolume, so large
+    orders are partially filled over several ticks. Every fill is
+    placed onto the events queue as a FillEvent, which the Portfolio
+    applies to its positions.
+    Pending orders are kept per pair as numpy arrays, so all orders
+    that are due on a tick are matched together, and a tick for a
+    pair without pending orders costs a single dictionary lookup.
+    """
+    # The Portfolio should wait for this handler's fills rather than
+    # update its positions when it places an order
+    reports_fills = True
+
+    def __init__(
+            self, pairs, events, latency_model=None, spread_model=None,
+            slippage_model=None, volume_units=1000000, participation=1.0
+    ):
+        """
+        :param pairs: the currency pairs being traded
+        :param events: the events queue
+        :param latency_model: e.g. FillModels.ConstantLatency
+        :param spread_model: e.g. FillModels.SpreadWidening
+        :param slippage_model: e.g. FillModels.FixedSlippage
+        :param volume_units: the units of liquidity in one unit of
+            tick volume
+        :param participation: the share of a tick's volume that
+            the broker's orders may take
+        """
+        self.pairs = pairs
+        self.events = events
+        self.latency_model = latency_model or ConstantLatency()
+        self.spread_model = spread_model or SpreadWidening()
+        self.slippage_model = slippage_model or FixedSlippage()
+        self.liquidity = volume_units * participation
+        self.time = None
+        self.next_order_id = 1
+        # pair -> arrays of signed remaining units, the time each
+        # order becomes active, its origin_ns and its order id
+        self.pending = {}
+
+    def now(self):
+        """
+        The time of the last tick in microseconds since the epoch.
+        """
+        if self.time is None:
+            return 0
+        return (self.time - EPOCH) // MICROSECOND
+
+    @staticmethod
+    def multiplier(side):
+        if side == "buy":
+            return 1
+        elif side == "sell":
+            return -1
+        else:
+            return 0
+
+    def execute_order(self, event):
+        if event.order_type != "market":
+            return
+        units = event.units * self.multiplier(event.side)
+        if units == 0:
+            return
+        pair = event.instrument.replace("_", "")
+        active = self.now() + self.latency_model.delay(1)
+        order = (
+            np.array([units], dtype=np.int64), active,
+            np.array([event.origin_ns], dtype=np.int64),
+            np.array([self.next_order_id], dtype=np.int64)
+        )
+        self.next_order_id += 1
+        if pair in self.pending:
+            order = tuple(np.concatenate(a) for a in zip(self.pending[pair], order))
+        self.pending[pair] = order
+
+    def available(self, volume):
+        if volume is None:
+            return None
+        return int(volume * self.liquidity)
+
+    @staticmethod
+    def allocate(wanted, available):
+        """
+        Shares the available units between orders in time priority.
+        """
+        if available is None:
+            return wanted
+        before = np.cumsum(wanted) - wanted
+        return np.clip(available - before, 0, wanted)
+
+    def on_tick(self, event):
+        """
+        Fills the pending orders of the tick's pair that are due.
+        """
+        self.time = event.time
+        pair = event.instrument
+        if pair not in self.pending:
+            return
+        units, active, origin_ns, order_ids = self.pending[pair]
+        due = active <= self.now()
+        if not due.any():
+            return
+
+        bid, ask = self.spread_model.widen(
+            int(event.bid.scaleb(PRICE_DECIMALS)), int(event.ask.scaleb(PRICE_DECIMALS))
+        )
+        buys = due & (units > 0)
+        sells = due & (units < 0)
+        ask_available = self.available(event.ask_volume)
+        bid_available = self.available(event.bid_volume)
+        filled = np.zeros_like(units)
+        prices = np.zeros_like(units)
+        if buys.any():
+            filled[buys] = self.allocate(units[buys], ask_available)
+            prices[buys] = ask + self.slippage_model.slippage(filled[buys], ask_available)
+        if sells.any():
+            filled[sells] = self.allocate(-units[sells], bid_available)
+            prices[sells] = bid - self.slippage_model.slippage(filled[sells], bid_available)
+            filled[sells] = -filled[sells]
+
+        remaining = units - filled
+        for i in np.flatnonzero(filled):
+            self.events.put(FillEvent(
+                pair, abs(int(filled[i])), "buy" if filled[i] > 0 else "sell",
+                Decimal(int(prices[i])).scaleb(-PRICE_DECIMALS),
+                "FILLED" if remaining[i] == 0 else "PARTIALLY_FILLED",
+                order_id=int(order_ids[i]), origin_ns=int(origin_ns[i])
+            ))
+
+        keep = remaining != 0
+        if keep.all():
+            self.pending[pair] = (remaining, active, origin_ns, order_ids)
+        elif keep.any():
+            self.pending[pair] = (remaining[keep], active[keep], origin_ns[keep], order_ids[keep])
+        else:
+            del self.pending[pair]
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -6,24 +7,59 @@ def create(pnl):
     Calculate the largest peak-to-trough drawdown of the PnL curve
     as well as the duration of the drawdown. Requires that the
     pnl_returns is a pandas Series.
+    The High Water Mark is a running maximum (starting from zero)
+    and the duration is the cumulative count of periods within each
+    group of periods delimited by a return to the High Water Mark.
     Parameters:
     pnl - A pandas Series representing period percentage returns.
     Returns:
-    drawdown, duration - Highest peak-to-trough drawdown and duration.
+    drawdown, max_dd, duration - The drawdown series, highest
+    peak-to-trough drawdown and longest duration.
     """
+    # Exclude the first period and calculate the High Water
+    # Mark as a running maximum, ignoring missing values
+    curve = pnl.values.astype(float)
+    curve[:1] = np.nan
+    hwm = np.fmax.accumulate(np.fmax(curve, 0.0))
+    drawdown = pd.Series(hwm - curve, index=pnl.index)
 
-    # Calculate the cumulative returns curve
-    # and set up the High Water Mark
-    hwm = [0]
+    # Count the periods spent in drawdown since the last reset
+    in_drawdown = (drawdown != 0).astype(int)
+    in_drawdown.iloc[:1] = 0
+    resets = (in_drawdown == 0).cumsum()
+    duration = in_drawdown.groupby(resets).cumsum()
+    return drawdown, drawdown.max(), duration.max()
 
-    # Create the drawdown and duration series
-    idx = pnl.index
-    drawdown = pd.Series(index=idx)
-    duration = pd.Series(index=idx)
 
-    # Loop over the index range
-    for t in range(1, len(idx)):
-        hwm.append(max(hwm[t - 1], pnl.ix[t]))
-        drawdown.ix[t] = (hwm[t] - pnl.ix[t])
-        duration.ix[t] = (0 if drawdown.ix[t] == 0 else duration.ix[t - 1] + 1)
-    return drawdown, drawdown.max(), duration.max()
+class DrawdownTracker(object):
+    """
+    Maintains the same High Water Mark, drawdown and duration
+    statistics as create, but incrementally, so that the current
+    drawdown of a live or running portfolio can be reported on each
+    update without recomputing the whole curve.
+    """
+
+    def __init__(self):
+        self.hwm = 0
+        self.drawdown = 0
+        self.max_drawdown = 0
+        self.duration = 0
+        self.max_duration = 0
+
+    def update(self, value):
+        """
+        Adds the latest value of the curve and returns the
+        current drawdown.
+        """
+        if value > self.hwm:
+            self.hwm = value
+        self.drawdown = self.hwm - value
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+        if self.drawdown == 0:
+            self.duration = 0
+        else:
+            self.duration += 1
+            if self.duration > self.max_duration:
+                self.max_duration = self.duration
+        return self.drawdown
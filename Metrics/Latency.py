@@ -0,0 +1,113 @@
+from __future__ import print_function
+
+import time
+
+# Each power of two is split into 2 ** SUB_BITS linear sub-buckets,
+# so percentiles are accurate to within 1 / 2 ** SUB_BITS.
+SUB_BITS = 3
+SUB_BUCKETS = 1 << SUB_BITS
+
+
+class Histogram(object):
+    """
+    A fixed-size log-linear histogram of non-negative integers
+    (nanoseconds or queue depths). Recording a value is a couple of
+    integer operations and a list increment, so it is cheap enough
+    to be used on every event.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (64 * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value):
+        bits = value.bit_length()
+        if bits <= SUB_BITS:
+            return value
+        return ((bits - SUB_BITS) << SUB_BITS) + ((value >> (bits - SUB_BITS - 1)) & (SUB_BUCKETS - 1))
+
+    @staticmethod
+    def _upper(index):
+        """
+        Returns the largest value that falls into a bucket.
+        """
+        if index < SUB_BUCKETS:
+            return index
+        shift = (index >> SUB_BITS) - 1
+        return ((SUB_BUCKETS + (index & (SUB_BUCKETS - 1)) + 1) << shift) - 1
+
+    def record(self, value):
+        if value < 0:
+            value = 0
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if self.count == 0:
+            return 0
+        target = p / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(self._upper(index), self.max)
+        return self.max
+
+
+class LatencyRecorder(object):
+    """
+    Aggregates per-stage latency histograms and the depth of the
+    events queue for an instrumented EventLoop, and periodically
+    prints them as a single log line.
+    Stages are named after the event type and handler, e.g.
+    "TICK.wait" (tick arrival to dispatch),
+    "TICK.MovingAverageCrossStrategy.calculate_signals" (handler
+    time), "tick_to_order" (tick arrival to the order having
+    been executed) and "tick_to_fill" (tick arrival to its fill
+    having been handled).
+    """
+
+    def __init__(self, report_interval=60.0):
+        self.report_interval = report_interval
+        self.stages = {}
+        self.queue_depth = Histogram()
+        self.last_report = time.monotonic()
+
+    def record(self, stage, ns):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.record(ns)
+
+    def record_depth(self, depth):
+        self.queue_depth.record(depth)
+
+    def report(self):
+        parts = []
+        for stage in sorted(self.stages):
+            h = self.stages[stage]
+            parts.append("%s p50=%.1fus p99=%.1fus max=%.1fus n=%d" % (
+                stage, h.percentile(50) / 1000.0, h.percentile(99) / 1000.0,
+                h.max / 1000.0, h.count
+            ))
+        parts.append("queue_depth p50=%d p99=%d max=%d" % (
+            self.queue_depth.percentile(50), self.queue_depth.percentile(99),
+            self.queue_depth.max
+        ))
+        return "Latency: " + "; ".join(parts)
+
+    def maybe_report(self):
+        """
+        Prints the report if report_interval seconds have passed
+        since the last one.
+        """
+        now = time.monotonic()
+        if now - self.last_report >= self.report_interval:
+            self.last_report = now
+            print(self.report())
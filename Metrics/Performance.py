@@ -0,0 +1,109 @@
+import math
+
+from Metrics.Drawdown import DrawdownTracker
+
+
+class PerformanceMetrics(object):
+    """
+    Accumulates the performance statistics of a portfolio online,
+    one update at a time, so that they are available during and at
+    the end of a run without re-reading the equity curve from disk.
+    It tracks the total value, period returns, the equity curve
+    (cumulative product of returns), its drawdown and duration, the
+    running moments needed for the Sharpe and Sortino ratios and
+    the number of trades.
+    """
+
+    def __init__(self):
+        self.periods = 0
+        self.total = None
+        self.initial_total = None
+        self.returns = 0.0
+        self.equity = 1.0
+        self.drawdown = DrawdownTracker()
+
+        # Running moments of the period returns (Welford's algorithm)
+        self.mean_return = 0.0
+        self.m2_return = 0.0
+        self.downside_sq_sum = 0.0
+
+        self.trades = 0
+        self.closed_trades = 0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.realised_pnl = 0.0
+
+    def update(self, total):
+        """
+        Adds the latest total value of the portfolio (balance plus
+        unrealised PnL) and updates every statistic.
+        """
+        total = float(total)
+        if self.total is None:
+            self.initial_total = total
+            self.returns = 0.0
+        else:
+            self.returns = total / self.total - 1.0 if self.total else 0.0
+            self.periods += 1
+            delta = self.returns - self.mean_return
+            self.mean_return += delta / self.periods
+            self.m2_return += delta * (self.returns - self.mean_return)
+            if self.returns < 0.0:
+                self.downside_sq_sum += self.returns * self.returns
+        self.total = total
+        self.equity *= 1.0 + self.returns
+        self.drawdown.update(self.equity)
+
+    def record_trade(self, pnl=None):
+        """
+        Counts an executed trade. pnl is the realised PnL when the
+        trade reduced or closed a position.
+        """
+        self.trades += 1
+        if pnl is not None:
+            pnl = float(pnl)
+            self.closed_trades += 1
+            self.realised_pnl += pnl
+            if pnl > 0:
+                self.winning_trades += 1
+            elif pnl < 0:
+                self.losing_trades += 1
+
+    def std_return(self):
+        if self.periods < 2:
+            return 0.0
+        return math.sqrt(self.m2_return / (self.periods - 1))
+
+    def sharpe_ratio(self, periods=1):
+        """
+        Returns the Sharpe ratio of the period returns (with a zero
+        benchmark), annualised by the number of periods per year.
+        """
+        std = self.std_return()
+        if std == 0.0:
+            return 0.0
+        return math.sqrt(periods) * self.mean_return / std
+
+    def sortino_ratio(self, periods=1):
+        """
+        Returns the Sortino ratio of the period returns (with a zero
+        target), annualised by the number of periods per year.
+        """
+        if self.periods == 0 or self.downside_sq_sum == 0.0:
+            return 0.0
+        downside = math.sqrt(self.downside_sq_sum / self.periods)
+        return math.sqrt(periods) * self.mean_return / downside
+
+    def summary(self):
+        return {
+            "total": self.total,
+            "total_return": self.equity - 1.0,
+            "max_drawdown": self.drawdown.max_drawdown,
+            "drawdown_duration": self.drawdown.max_duration,
+            "sharpe_ratio": self.sharpe_ratio(),
+            "sortino_ratio": self.sortino_ratio(),
+            "trades": self.trades,
+            "closed_trades": self.closed_trades,
+            "winning_trades": self.winning_trades,
+            "losing_trades": self.losing_trades
+        }
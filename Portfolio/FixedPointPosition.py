@@ -0,0 +1,175 @@
+from decimal import Decimal
+from math import gcd
+
+# Prices and profits are held as integers in units of 0.00001, the
+# precision that Position quantizes to, and realised PnL in cents.
+PRICE_DECIMALS = 5
+PRICE_SCALE = 10 ** PRICE_DECIMALS
+CASH_DECIMALS = 2
+
+
+def to_fixed(price):
+    """
+    Converts a Decimal (or float) price into an integer number
+    of 0.00001 units.
+    """
+    if isinstance(price, Decimal):
+        return int(price.scaleb(PRICE_DECIMALS))
+    return int(round(price * PRICE_SCALE))
+
+
+def from_fixed(value, decimals=PRICE_DECIMALS):
+    return Decimal(value).scaleb(-decimals)
+
+
+def div_half_down(numerator, denominator):
+    """
+    Integer division of numerator by a positive denominator,
+    rounding ties towards zero as ROUND_HALF_DOWN does.
+    """
+    q, r = divmod(abs(numerator), denominator)
+    if 2 * r > denominator:
+        q += 1
+    return q if numerator >= 0 else -q
+
+
+class FixedPointPosition(object):
+    """
+    An integer-pip implementation of Position with the same interface
+    and the same quantized results. Prices, pips and profits are kept
+    as integer multiples of 0.00001 and the average price as an exact
+    integer ratio, so updating the position on each tick only involves
+    integer arithmetic instead of Decimal string conversions and
+    quantize calls. Decimal values are only built when read, and
+    realised PnL is returned as an exact Decimal to the cent.
+    """
+
+    def __init__(self, home_currency, position_type, currency_pair, units, ticker, price=None):
+        """
+
+        :param home_currency: the local currency which the balance is represented as
+        :param position_type: Either "long" or "short"
+        :param currency_pair: the currency pair that is being traded (e.g. EURUSD)
+        :param units: the number of units held by the position
+        :param ticker: the price ticker
+        :param price: the fill price, if it is not the current ask (long) or bid (short)
+        """
+        self.ticker = ticker
+        self.units = int(units)
+        self.currency_pair = currency_pair
+        self.position_type = position_type
+        self.home_currency = home_currency
+        self.mult = 1 if position_type == "long" else -1
+        self.current_price_fp = None
+        self.average_price_num = None
+        self.average_price_den = 1
+        self.base_currency = None
+        self.quote_currency = None
+        self.quote_home_currency_pair = None
+        self.profit_base_fp = 0
+        self.profit_percentage_fp = 0
+
+        self.setup_currencies()
+        if price is not None:
+            self.average_price_num = to_fixed(price)
+        self.calculate_profit()
+
+    @property
+    def current_price(self):
+        return from_fixed(self.current_price_fp)
+
+    @property
+    def average_price(self):
+        return from_fixed(self.average_price_num) / self.average_price_den
+
+    @property
+    def profit_base(self):
+        return from_fixed(self.profit_base_fp)
+
+    @property
+    def profit_percentage(self):
+        return from_fixed(self.profit_percentage_fp)
+
+    def calculate_pips(self):
+        """
+        Returns the number of 0.00001 units that the position has
+        moved by since purchase, rounded half down.
+        """
+        return div_half_down(
+            self.mult * (self.current_price_fp * self.average_price_den - self.average_price_num),
+            self.average_price_den
+        )
+
+    def calculate_profit(self):
+        pips = self.calculate_pips()
+        ticker_qh = self.ticker.prices[self.quote_home_currency_pair]
+        if self.position_type == "long":
+            qh_close = to_fixed(ticker_qh["bid"])
+        else:
+            qh_close = to_fixed(ticker_qh["ask"])
+        self.profit_base_fp = div_half_down(pips * qh_close * self.units, PRICE_SCALE)
+        self.profit_percentage_fp = div_half_down(self.profit_base_fp * 100, self.units)
+
+    def add_units(self, units, price=None):
+        cp = self.ticker.prices[self.currency_pair]
+        if price is not None:
+            add_price = to_fixed(price)
+        elif self.position_type == "long":
+            add_price = to_fixed(cp["ask"])
+        else:
+            add_price = to_fixed(cp["bid"])
+        new_total_units = self.units + units
+        self.average_price_num = self.average_price_num * self.units + add_price * units * self.average_price_den
+        self.average_price_den *= new_total_units
+        common = gcd(self.average_price_num, self.average_price_den)
+        self.average_price_num //= common
+        self.average_price_den //= common
+        self.units = new_total_units
+        self.update_position_price()
+
+    def update_position_price(self, price=None):
+        ticker_cur = self.ticker.prices[self.currency_pair]
+        if price is not None:
+            self.current_price_fp = to_fixed(price)
+        elif self.position_type == "long":
+            self.current_price_fp = to_fixed(ticker_cur["bid"])
+        else:
+            self.current_price_fp = to_fixed(ticker_cur["ask"])
+        self.calculate_profit()
+
+    def setup_currencies(self):
+        self.base_currency = self.currency_pair[:3]
+        self.quote_currency = self.currency_pair[3:]
+
+        self.quote_home_currency_pair = "%s%s" % (self.quote_currency, self.home_currency)
+
+        ticker_currency = self.ticker.prices[self.currency_pair]
+
+        if self.position_type == "long":
+            self.average_price_num = to_fixed(ticker_currency["ask"])
+            self.current_price_fp = to_fixed(ticker_currency["bid"])
+        else:
+            self.average_price_num = to_fixed(ticker_currency["bid"])
+            self.current_price_fp = to_fixed(ticker_currency["ask"])
+
+    def _realised_pnl(self, units, price=None):
+        ticker_qh = self.ticker.prices[self.quote_home_currency_pair]
+        if self.position_type == "long":
+            qh_close = to_fixed(ticker_qh["ask"])
+        else:
+            qh_close = to_fixed(ticker_qh["bid"])
+        self.update_position_price(price)
+        # Calculate PnL in cents
+        pnl = div_half_down(
+            self.calculate_pips() * qh_close * units,
+            10 ** (2 * PRICE_DECIMALS - CASH_DECIMALS)
+        )
+        return from_fixed(pnl, CASH_DECIMALS)
+
+    def remove_units(self, units, price=None):
+        units = int(units)
+        self.units -= units
+        return self._realised_pnl(units, price)
+
+    def close_position(self, price=None):
+        return self._realised_pnl(self.units, price)
@@ -1,19 +1,44 @@
-import os
+import datetime
 from copy import deepcopy
 from decimal import Decimal
-import pandas as pd
 
 from Events.OrderEvent import OrderEvent
 from Portfolio.Position import Position
+from Portfolio.FixedPointPosition import FixedPointPosition
+from Portfolio.EquityRecorder import EquityRecorder
+from Portfolio.PositionTable import PositionTable
+from Portfolio.RiskEngine import RiskEngine
+from Price.PriceBook import PriceBook
 import settings
-from Metrics import Drawdown
+from Metrics.Performance import PerformanceMetrics
 
 
 class Portfolio(object):
     def __init__(
             self, ticker, events, backtest, home_currency="GBP",
             leverage=20, equity=Decimal("100000.00"),
-            risk_per_trade=Decimal("0.02")):
+            risk_per_trade=Decimal("0.02"), output_dir=None,
+            fixed_point=False, wait_for_fills=False,
+            record_every=1, record_interval=None, equity_csv=False,
+            risk_limits=None):
+        """
+        When fixed_point is True positions are accounted for with
+        FixedPointPosition, which keeps prices and PnL as integer
+        pips rather than Decimals on every update.
+        When wait_for_fills is True a signal only places an order,
+        and the positions are updated by execute_fill once the
+        execution handler reports the order's fills, at the fill
+        prices. Otherwise the positions are updated straight away
+        at the current prices.
+        Backtests record the equity curve with an EquityRecorder,
+        keeping every record_every-th snapshot at most one per
+        record_interval seconds, and also export it to equity.csv
+        at the end when equity_csv is True.
+        Every signal is checked by a RiskEngine, created with the
+        leverage and the keyword arguments in risk_limits (e.g.
+        {"max_exposure": 5, "max_var": 0.01}), and is rejected if
+        its order would break one of the limits.
+        """
         self.backtest = backtest
         self.ticker = ticker
         self.events = events
@@ -24,153 +49,244 @@ class Portfolio(object):
         self.risk_per_trade = risk_per_trade
         self.trade_units = self.calc_risk_position_size()
         self.positions = {}
+        self.price_book = PriceBook(ticker.pairs, ticker.prices, home_currency)
+        self.position_table = PositionTable(ticker.pairs, self.price_book)
+        self.risk = RiskEngine(
+            ticker.pairs, self.position_table, home_currency, leverage, **(risk_limits or {})
+        )
+        self.output_dir = output_dir or settings.OUTPUT_RESULTS_DIR
+        self.position_class = FixedPointPosition if fixed_point else Position
+        self.wait_for_fills = wait_for_fills
+        self.record_every = record_every
+        self.record_interval = record_interval
+        self.equity_csv = equity_csv
+        self.metrics = PerformanceMetrics()
 
         if self.backtest:
-            self.backtest_file = self.create_equity_file()
+            self.equity_recorder = self.create_equity_recorder()
 
     def calc_risk_position_size(self):
         return self.equity * self.risk_per_trade
 
+    def calc_total_value(self):
+        """
+        Returns the balance plus the unrealised PnL of every
+        open position, as last marked to market by the position
+        table.
+        """
+        return float(self.balance) + self.position_table.unrealised
+
+    def sync_position(self, currency_pair):
+        """
+        Copies the units, side and average price of the position
+        in currency_pair, if there is one, into the position table.
+        """
+        ps = self.positions.get(currency_pair)
+        if ps is None:
+            self.position_table.clear_position(currency_pair)
+        else:
+            self.position_table.set_position(
+                currency_pair, float(ps.units),
+                1.0 if ps.position_type == "long" else -1.0,
+                float(ps.average_price)
+            )
+
     def add_new_position(
-            self, position_type, currency_pair, units, ticker
+            self, position_type, currency_pair, units, ticker, price=None
     ):
-        ps = Position(
+        ps = self.position_class(
             self.home_currency, position_type,
-            currency_pair, units, ticker
+            currency_pair, units, ticker, price
         )
         self.positions[currency_pair] = ps
+        self.sync_position(currency_pair)
+        self.metrics.record_trade()
 
-    def add_position_units(self, currency_pair, units):
+    def add_position_units(self, currency_pair, units, price=None):
         if currency_pair not in self.positions:
             return False
         else:
             ps = self.positions[currency_pair]
-            ps.add_units(units)
+            ps.add_units(units, price)
+            self.sync_position(currency_pair)
+            self.metrics.record_trade()
             return True
 
-    def remove_position_units(self, currency_pair, units):
+    def remove_position_units(self, currency_pair, units, price=None):
         if currency_pair not in self.positions:
             return False
         else:
             ps = self.positions[currency_pair]
-            pnl = ps.remove_units(units)
+            pnl = ps.remove_units(units, price)
+            self.sync_position(currency_pair)
             self.balance += pnl
+            self.metrics.record_trade(pnl)
             return True
 
-    def close_position(self, currency_pair):
+    def close_position(self, currency_pair, price=None):
         if currency_pair not in self.positions:
             return False
         else:
             ps = self.positions[currency_pair]
-            pnl = ps.close_position()
+            pnl = ps.close_position(price)
             self.balance += pnl
+            self.metrics.record_trade(pnl)
             del [self.positions[currency_pair]]
+            self.sync_position(currency_pair)
             return True
 
     def update_portfolio(self, tick_event):
         """
-        This updates all positions ensuring an up to date
-        unrealised profit and loss (PnL).
+        This marks every open position to market in one step of
+        the position table, as the home currency value of all of
+        them may change with any pair's prices, and feeds the new
+        total value into the online performance metrics.
         """
         currency_pair = tick_event.instrument
-        if currency_pair in self.positions:
-            ps = self.positions[currency_pair]
-            ps.update_position_price()
+        self.price_book.update(currency_pair)
+        prices = self.ticker.prices[currency_pair]
+        if prices["bid"] is not None:
+            bid, ask = float(prices["bid"]), float(prices["ask"])
+            self.position_table.update_price(currency_pair, bid, ask)
+            # Streamed prices are timestamped with strings, so live
+            # trading samples returns by the wall-clock time instead
+            self.risk.update(
+                currency_pair, bid, ask,
+                prices["time"] if self.backtest else datetime.datetime.now(datetime.timezone.utc)
+            )
+        self.position_table.mark_to_market()
+        self.metrics.update(self.calc_total_value())
+        if self.backtest:
+            time = self.ticker.prices[currency_pair]["time"]
+            if self.equity_recorder.due(time):
+                self.write_equity_line(time)
 
-    def execute_signal(self, signal_event):
-        # Check that the prices ticker contains all necessary currency pairs prior to executing an order
-        execute = True
-        tp = self.ticker.prices
-        for pair in tp:
-            if tp[pair]["ask"] is None or tp[pair]["bid"] is None:
-                execute = False
+    def write_equity_line(self, time):
+        """
+        Records the current balance, the unrealised PnL of every
+        pair and the running performance metrics as a snapshot of
+        the backtest equity curve.
+        """
+        values = [float(self.balance)]
+        values += self.position_table.profit.tolist()
+        m = self.metrics
+        values += (m.total, m.returns, m.equity, m.drawdown.drawdown)
+        self.equity_recorder.record(time, values)
 
+    def execute_signal(self, signal_event):
         # All necessary pricing data is available, we can execute
-        if execute:
+        if self.price_book.ready:
             side = signal_event.side
             currency_pair = signal_event.instrument
             units = int(self.trade_units)
 
-            # If there is no position, create one
-            if currency_pair not in self.positions:
-                if side == "buy":
-                    position_type = "long"
-                else:
-                    position_type = "short"
-                self.add_new_position(
-                    position_type, currency_pair,
-                    units, self.ticker
-                )
-
-            # If a position exists add or remove units
-            else:
-                position = self.positions[currency_pair]
-
-                if side == "buy" and position.position_type == "long":
-                    self.add_position_units(currency_pair, units)
-
-                elif side == "sell" and position.position_type == "long":
-                    if units == position.units:
-                        self.close_position(currency_pair)
-                    elif units < position.units:
-                        self.remove_position_units(currency_pair, units)
-                    elif units > position.units:
-                        new_units = units - position.units
-                        self.close_position(currency_pair)
-                        self.add_new_position("short", currency_pair, new_units, self.ticker)
-
-                elif side == "buy" and position.position_type == "short":
-                    if units == position.units:
-                        self.close_position(currency_pair)
-                    elif units < position.units:
-                        self.remove_position_units(currency_pair, units)
-                    elif units > position.units:
-                        new_units = units - position.units
-                        self.close_position(currency_pair)
-                        self.add_new_position("long", currency_pair, new_units, self.ticker)
-
-                elif side == "sell" and position.position_type == "short":
-                    self.add_position_units(currency_pair, units)
-
-            order = OrderEvent("%s_%s" % (currency_pair[:3], currency_pair[3:]), units, "market", side)
+            rejection = self.risk.check(currency_pair, side, units, self.calc_total_value())
+            if rejection is not None:
+                print("Signal to %s %s %s was rejected: %s" % (side, units, currency_pair, rejection))
+                return
+
+            if not self.wait_for_fills:
+                self.apply_order(side, currency_pair, units)
+
+            order = OrderEvent(
+                "%s_%s" % (currency_pair[:3], currency_pair[3:]), units, "market", side,
+                signal_event.origin_ns
+            )
             self.events.put(order)
 
-            print("Portfolio Balance: %s" % self.balance)
+            print("Portfolio Balance: %s, Drawdown: %s" % (self.balance, self.metrics.drawdown.drawdown))
         else:
             print("Unable to execute order as price data was insufficient.")
 
+    def apply_order(self, side, currency_pair, units, price=None):
+        """
+        Opens, adds to, reduces, closes or reverses the position in
+        currency_pair for an order of units on the given side, at
+        price or, if price is None, at the current prices.
+        """
+        # If there is no position, create one
+        if currency_pair not in self.positions:
+            if side == "buy":
+                position_type = "long"
+            else:
+                position_type = "short"
+            self.add_new_position(
+                position_type, currency_pair,
+                units, self.ticker, price
+            )
+
+        # If a position exists add or remove units
+        else:
+            position = self.positions[currency_pair]
+
+            if side == "buy" and position.position_type == "long":
+                self.add_position_units(currency_pair, units, price)
+
+            elif side == "sell" and position.position_type == "long":
+                if units == position.units:
+                    self.close_position(currency_pair, price)
+                elif units < position.units:
+                    self.remove_position_units(currency_pair, units, price)
+                elif units > position.units:
+                    new_units = units - position.units
+                    self.close_position(currency_pair, price)
+                    self.add_new_position("short", currency_pair, new_units, self.ticker, price)
+
+            elif side == "buy" and position.position_type == "short":
+                if units == position.units:
+                    self.close_position(currency_pair, price)
+                elif units < position.units:
+                    self.remove_position_units(currency_pair, units, price)
+                elif units > position.units:
+                    new_units = units - position.units
+                    self.close_position(currency_pair, price)
+                    self.add_new_position("long", currency_pair, new_units, self.ticker, price)
+
+            elif side == "sell" and position.position_type == "short":
+                self.add_position_units(currency_pair, units, price)
+
+    def execute_fill(self, fill_event):
+        """
+        Applies the units filled by a FillEvent to the positions at
+        the fill price, and marks them to market again without
+        updating the metrics or the equity curve, which are only
+        updated by ticks and signals. Rejected or failed orders are
+        only reported.
+        """
+        if fill_event.status not in ("FILLED", "PARTIALLY_FILLED"):
+            print("Order for %s %s %s was not filled: %s %s" % (
+                fill_event.side, fill_event.units, fill_event.instrument,
+                fill_event.status, fill_event.message
+            ))
+            return
+        currency_pair = fill_event.instrument.replace("_", "")
+        self.apply_order(fill_event.side, currency_pair, int(fill_event.units), fill_event.price)
+        self.position_table.mark_to_market()
+
     def output_results(self):
-        # Closes off the Backtest.csv file so it can be
-        # read via Pandas without problems
-        self.backtest_file.close()
-
-        in_filename = "backtest.csv"
-        out_filename = "equity.csv"
-        in_file = os.path.join(settings.OUTPUT_RESULTS_DIR, in_filename)
-        out_file = os.path.join(settings.OUTPUT_RESULTS_DIR, out_filename)
-
-        # Create equity curve dataframe
-        df = pd.read_csv(in_file, index_col=0)
-        df.dropna(inplace=True)
-        df["Total"] = df.sum(axis=1)
-        df["Returns"] = df["Total"].pct_change()
-        df["Equity"] = (1.0 + df["Returns"]).cumprod()
-
-        # Create drawdown statistics
-        drawdown, max_dd, dd_duration = Drawdown.create(df["Equity"])
-        df["Drawdown"] = drawdown
-        df.to_csv(out_file, index=True)
-
-        print("Simulation complete and results exported to %s" % out_filename)
-
-    def create_equity_file(self):
-        filename = "backtest.csv"
-        out_file = open(os.path.join(settings.OUTPUT_RESULTS_DIR, filename), "w")
-        header = "Timestamp,Balance"
-        for pair in self.ticker.pairs:
-            header += ",%s" % pair
-        header += "\n"
-        out_file.write(header)
-        if self.backtest:
-            print(header[:-2])
-        return out_file
+        """
+        Records the final snapshot if it was downsampled away,
+        flushes the equity curve, which already contains the Total,
+        Returns, Equity and Drawdown columns, and returns the
+        maximum drawdown and drawdown duration from the online
+        performance metrics.
+        """
+        recorder = self.equity_recorder
+        if recorder.skipped:
+            self.write_equity_line(recorder.last_time)
+        recorder.close()
+        for name, value in sorted(self.metrics.summary().items()):
+            print("%s: %s" % (name, value))
+        if self.equity_csv:
+            print("Simulation complete and results exported to %s" % EquityRecorder.to_csv(self.output_dir))
+        else:
+            print("Simulation complete and results recorded in %s" % self.output_dir)
+        return self.metrics.drawdown.max_drawdown, self.metrics.drawdown.max_duration
+
+    def create_equity_recorder(self):
+        recorder = EquityRecorder(
+            self.output_dir, self.ticker.pairs,
+            every=self.record_every, interval=self.record_interval
+        )
+        print(",".join(recorder.dtype.names))
+        return recorder
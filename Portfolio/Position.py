@@ -7,7 +7,7 @@ class Position:
     market traded
     """
 
-    def __init__(self, home_currency, position_type, currency_pair, units, ticker):
+    def __init__(self, home_currency, position_type, currency_pair, units, ticker, price=None):
         """
 
         :param home_currency: the local currency which the balance is represented as
@@ -15,6 +15,7 @@ class Position:
         :param currency_pair: the currency pair that is being traded (e.g. EURUSD)
         :param units: the number of units held by the position
         :param ticker: the price ticker
+        :param price: the fill price, if it is not the current ask (long) or bid (short)
         """
         self.ticker = ticker
         self.units = units
@@ -28,6 +29,8 @@ class Position:
         self.quote_home_currency_pair = None
 
         self.setup_currencies()
+        if price is not None:
+            self.average_price = Decimal(str(price))
 
         self.profit_base = self.calculate_profit_base()
         self.profit_percentage = self.calculate_profit_percentage()
@@ -64,9 +67,11 @@ class Position:
             Decimal("0.00001"), ROUND_HALF_DOWN
         )
 
-    def add_units(self, units):
+    def add_units(self, units, price=None):
         cp = self.ticker.prices[self.currency_pair]
-        if self.position_type == "long":
+        if price is not None:
+            add_price = Decimal(str(price))
+        elif self.position_type == "long":
             add_price = cp["ask"]
         else:
             add_price = cp["bid"]
@@ -76,9 +81,11 @@ class Position:
         self.units = new_total_units
         self.update_position_price()
 
-    def update_position_price(self):
+    def update_position_price(self, price=None):
         ticker_cur = self.ticker.prices[self.currency_pair]
-        if self.position_type == "long":
+        if price is not None:
+            self.current_price = Decimal(str(price))
+        elif self.position_type == "long":
             self.current_price = Decimal(str(ticker_cur["bid"]))
         else:
             self.current_price = Decimal(str(ticker_cur["ask"]))
@@ -100,7 +107,7 @@ class Position:
             self.average_price = Decimal(str(ticker_currency["bid"]))
             self.current_price = Decimal(str(ticker_currency["ask"]))
 
-    def remove_units(self, units):
+    def remove_units(self, units, price=None):
         dec_units = Decimal(str(units))
         ticker_qh = self.ticker.prices[self.quote_home_currency_pair]
         if self.position_type == "long":
@@ -108,19 +115,19 @@ class Position:
         else:
             qh_close = ticker_qh["bid"]
         self.units -= dec_units
-        self.update_position_price()
+        self.update_position_price(price)
         # Calculate PnL
         pnl = self.calculate_pips() * qh_close * dec_units
         getcontext().rounding = ROUND_HALF_DOWN
         return pnl.quantize(Decimal("0.01"))
 
-    def close_position(self):
+    def close_position(self, price=None):
         ticker_qh = self.ticker.prices[self.quote_home_currency_pair]
         if self.position_type == "long":
             qh_close = ticker_qh["ask"]
         else:
             qh_close = ticker_qh["bid"]
-        self.update_position_price()
+        self.update_position_price(price)
         # Calculate PnL
         pnl = self.calculate_pips() * qh_close * self.units
         getcontext().rounding = ROUND_HALF_DOWN
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+class PositionTable(object):
+    """
+    Keeps the open positions of every streamed pair as a struct of
+    numpy arrays (units, side, average price, current price and the
+    quote/home conversion rate, one element per pair), so that every
+    position is marked to market in a single vectorised step instead
+    of only the position whose pair has ticked.
+    The quote/home rate of a pair is the product of the prices of a
+    chain of streamed pairs, each leg being a pair or its inverse,
+    as found by the PriceBook. All the prices needed are kept in one
+    array, the bids, inverse bids, asks and inverse asks of the
+    streamed pairs followed by a constant 1 and a NaN, and each
+    position keeps the indices into it of its current price and of
+    its rate's legs (padded with the 1), for its side. A currency
+    that cannot be converted has the NaN as its rate.
+    Prices are floats: the Position objects still account for the
+    realised PnL with Decimals.
+    """
+
+    def __init__(self, pairs, price_book):
+        self.pairs = pairs
+        self.index = {p: i for i, p in enumerate(pairs)}
+        n = len(pairs)
+        self.one = 4 * n
+        self.nan = 4 * n + 1
+        self.prices = np.full(4 * n + 2, np.nan)
+        self.prices[self.one] = 1.0
+        self.units = np.zeros(n)
+        # 1 for long, -1 for short and 0 for no position
+        self.side = np.zeros(n)
+        self.signed_units = np.zeros(n)
+        self.average_price = np.zeros(n)
+        self.current_price = np.zeros(n)
+        self.rate = np.zeros(n)
+        self.profit = np.zeros(n)
+        self.unrealised = 0.0
+        self.open = 0
+        # The legs of the bid (long) and ask (short) rates of each pair
+        self.bid_legs = self.create_legs(pairs, price_book)
+        self.ask_legs = np.where(self.bid_legs < self.one, self.bid_legs + 2 * n, self.bid_legs)
+        # The indices of the prices that positions are marked at
+        self.marks = np.full(n, self.one)
+        self.legs = np.full(self.bid_legs.shape, self.one)
+
+    def create_legs(self, pairs, price_book):
+        """
+        Returns the matrix of the indices of the bids or inverse bids
+        which multiply into each pair's quote/home bid rate, padded
+        with the index of the constant 1.
+        """
+        n = len(pairs)
+        chains = []
+        for pair in pairs:
+            path = price_book.find_path(pair[3:], price_book.home_currency)
+            if path is None:
+                chains.append([self.nan])
+                continue
+            chain = []
+            for a, b in zip(path[:-1], path[1:]):
+                if a + b in self.index:
+                    chain.append(self.index[a + b])
+                else:
+                    chain.append(n + self.index[b + a])
+            chains.append(chain)
+        legs = np.full((n, max([len(c) for c in chains] + [1])), self.one)
+        for i, chain in enumerate(chains):
+            legs[i, :len(chain)] = chain
+        return legs
+
+    def update_price(self, pair, bid, ask):
+        i = self.index[pair]
+        n = len(self.pairs)
+        prices = self.prices
+        prices[i] = bid
+        prices[n + i] = 1.0 / bid
+        prices[2 * n + i] = ask
+        prices[3 * n + i] = 1.0 / ask
+
+    def unit_value(self, pair, side):
+        """
+        Returns the home currency value of one unit of a long (side 1)
+        or short (side -1) position in pair, at the current prices.
+        """
+        i = self.index[pair]
+        if side > 0:
+            return float(self.prices[i] * self.prices[self.bid_legs[i]].prod())
+        return float(self.prices[2 * len(self.pairs) + i] * self.prices[self.ask_legs[i]].prod())
+
+    def set_position(self, pair, units, side, average_price):
+        i = self.index[pair]
+        if not self.side[i]:
+            self.open += 1
+        self.units[i] = units
+        self.side[i] = side
+        self.signed_units[i] = side * units
+        self.average_price[i] = average_price
+        if side > 0:
+            self.marks[i] = i
+            self.legs[i] = self.bid_legs[i]
+        else:
+            self.marks[i] = 2 * len(self.pairs) + i
+            self.legs[i] = self.ask_legs[i]
+
+    def clear_position(self, pair):
+        i = self.index[pair]
+        if self.side[i]:
+            self.open -= 1
+        self.units[i] = 0.0
+        self.side[i] = 0.0
+        self.signed_units[i] = 0.0
+        self.average_price[i] = 0.0
+        self.marks[i] = self.one
+        self.legs[i] = self.one
+        self.profit[i] = 0.0
+
+    def mark_to_market(self):
+        """
+        Revalues every open position at the current bid (long) or ask
+        (short), converted into the home currency at the quote/home
+        bid (long) or ask (short), and returns the total unrealised
+        PnL. Pairs without a position are marked at 1 against an
+        average price of 0 but hold no units.
+        """
+        if not self.open:
+            self.unrealised = 0.0
+            return self.unrealised
+        prices = self.prices
+        self.current_price = prices[self.marks]
+        if self.legs.shape[1] == 1:
+            self.rate = prices[self.legs[:, 0]]
+        else:
+            self.rate = prices[self.legs].prod(axis=1)
+        profit = self.current_price - self.average_price
+        profit *= self.rate
+        profit *= self.signed_units
+        self.profit = profit
+        self.unrealised = float(profit.sum())
+        return self.unrealised
@@ -0,0 +1,134 @@
+import datetime
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+
+class RiskEngine(object):
+    """
+    Checks every signal against margin, exposure and value at risk
+    (VaR) limits before the Portfolio places its order.
+    The state is kept up to date incrementally: the PositionTable
+    holds the positions and their mark to market prices, and the
+    covariance of the pairs' log mid price returns is updated once
+    every sample_interval seconds (of tick time) as an exponentially
+    weighted moving average with the given decay, as in RiskMetrics.
+    A check then only prices the order against that state, with
+    numpy operations over the pairs, which takes microseconds.
+    The limits are:
+      - the margin used (the home currency notional of every
+        position over the leverage) may not exceed the equity,
+      - max_exposure, if given, caps the absolute net exposure to
+        each currency other than the home currency, as a multiple
+        of the equity,
+      - max_var, if given, caps the VaR at the given confidence
+        over one sample interval, as a fraction of the equity, once
+        min_samples returns have been seen.
+    """
+
+    def __init__(
+            self, pairs, position_table, home_currency, leverage,
+            max_exposure=None, max_var=None, confidence=0.99,
+            sample_interval=60.0, decay=0.94, min_samples=30):
+        self.pairs = pairs
+        self.table = position_table
+        self.home_currency = home_currency
+        self.leverage = leverage
+        self.max_exposure = max_exposure
+        self.max_var = max_var
+        self.z = NormalDist().inv_cdf(confidence)
+        self.sample_interval = datetime.timedelta(seconds=sample_interval)
+        self.decay = decay
+        self.min_samples = min_samples
+        self.currencies = sorted(set([p[:3] for p in pairs] + [p[3:] for p in pairs]))
+        # Net exposure to each currency of a unit of notional in each pair
+        self.incidence = np.zeros((len(self.currencies), len(pairs)))
+        for i, pair in enumerate(pairs):
+            self.incidence[self.currencies.index(pair[:3]), i] = 1.0
+            self.incidence[self.currencies.index(pair[3:]), i] = -1.0
+        self.foreign = np.array([c != home_currency for c in self.currencies])
+        self.log_prices = np.full(len(pairs), np.nan)
+        self.sampled_prices = None
+        self.next_sample = None
+        self.covariance = np.zeros((len(pairs), len(pairs)))
+        self.samples = 0
+
+    def update(self, pair, bid, ask, time):
+        """
+        Records the latest mid price of a pair and, once a sample
+        interval has passed, updates the covariance with the returns
+        of every pair since the previous sample.
+        """
+        self.log_prices[self.table.index[pair]] = math.log((bid + ask) / 2.0)
+        if self.next_sample is None:
+            self.next_sample = time + self.sample_interval
+        elif time >= self.next_sample:
+            self.next_sample = time + self.sample_interval
+            self.sample()
+
+    def sample(self):
+        if np.isnan(self.log_prices).any():
+            return
+        if self.sampled_prices is not None:
+            returns = self.log_prices - self.sampled_prices
+            self.covariance *= self.decay
+            self.covariance += (1.0 - self.decay) * np.outer(returns, returns)
+            self.samples += 1
+        self.sampled_prices = self.log_prices.copy()
+
+    def notional(self):
+        """
+        Returns the signed home currency value of every position.
+        """
+        table = self.table
+        if not table.open:
+            return np.zeros(len(self.pairs))
+        return table.signed_units * table.current_price * table.rate
+
+    def used_margin(self, notional=None):
+        notional = self.notional() if notional is None else notional
+        return float(np.abs(notional).sum()) / self.leverage
+
+    def free_margin(self, equity):
+        return float(equity) - self.used_margin()
+
+    def exposure(self, notional=None):
+        """
+        Returns a dictionary of each currency to the home currency
+        value of the net exposure to it.
+        """
+        notional = self.notional() if notional is None else notional
+        return dict(zip(self.currencies, self.incidence.dot(notional).tolist()))
+
+    def var(self, notional=None):
+        notional = self.notional() if notional is None else notional
+        variance = float(notional.dot(self.covariance).dot(notional))
+        return self.z * math.sqrt(max(variance, 0.0))
+
+    def check(self, pair, side, units, equity):
+        """
+        Returns None if an order of units on the given side of pair
+        keeps the portfolio within every limit, or otherwise the
+        reason it does not.
+        """
+        equity = float(equity)
+        notional = self.notional()
+        sign = 1.0 if side == "buy" else -1.0
+        notional[self.table.index[pair]] += sign * units * self.table.unit_value(pair, sign)
+
+        used_margin = self.used_margin(notional)
+        if not used_margin <= equity:
+            return "used margin %.2f would exceed the equity %.2f" % (used_margin, equity)
+        if self.max_exposure is not None:
+            exposure = np.abs(self.incidence.dot(notional))[self.foreign]
+            if exposure.size and not exposure.max() <= self.max_exposure * equity:
+                currency = np.array(self.currencies)[self.foreign][exposure.argmax()]
+                return "exposure to %s of %.2f would exceed %.2f" % (
+                    currency, exposure.max(), self.max_exposure * equity
+                )
+        if self.max_var is not None and self.samples >= self.min_samples:
+            var = self.var(notional)
+            if not var <= self.max_var * equity:
+                return "VaR %.2f would exceed %.2f" % (var, self.max_var * equity)
+        return None
@@ -0,0 +1,249 @@
+from __future__ import print_function
+
+import asyncio
+import queue
+import ssl
+import time
+from urllib.parse import urlencode
+
+from Price.StreamingPriceHandler import StreamingForexPrices
+
+
+class AsyncStreamingForexPrices(StreamingForexPrices):
+    """
+    An asyncio implementation of the OANDA price stream.
+    The HTTP response is read in large chunks and split into
+    complete lines, which are handed to a consumer through a
+    bounded buffer. When the buffer is full the socket is no
+    longer read, and when the events queue holds max_pending
+    events (or is full, if it is bounded) the consumer waits for
+    the trading loop, so a slow consumer applies backpressure
+    instead of growing memory without limit. The events queue
+    itself is best left unbounded, as the trading loop places its
+    own signals and orders onto it and would block on a full one.
+    Every chunk's complete lines are decoded together as one batch
+    (see StreamingForexPrices.on_lines), and the consumer is
+    restarted should decoding a batch fail.
+    A watchdog closes the connection when no HEARTBEAT message has
+    been received for heartbeat_timeout seconds, and every
+    disconnection or error response leads to a reconnect with
+    exponential backoff rather than ending the price thread.
+    """
+
+    def __init__(
+            self, domain, access_token, account_id, pairs, events_queue,
+            port=443, use_ssl=True, heartbeat_timeout=10.0,
+            initial_backoff=1.0, max_backoff=60.0,
+            buffer_size=10000, read_size=65536, capture_file=None,
+            max_pending=10000, pending_interval=0.001
+    ):
+        super(AsyncStreamingForexPrices, self).__init__(
+            domain, access_token, account_id, pairs, events_queue,
+            capture_file=capture_file
+        )
+        self.port = port
+        self.use_ssl = use_ssl
+        self.heartbeat_timeout = heartbeat_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.buffer_size = buffer_size
+        self.read_size = read_size
+        self.max_pending = max_pending
+        self.pending_interval = pending_interval
+        self.last_heartbeat = None
+        self.received = False
+        self.reconnects = 0
+        self.running = False
+        self.loop = None
+        self.task = None
+        self.consumer = None
+
+    def _request(self):
+        pairs_oanda = ["%s_%s" % (p[:3], p[3:]) for p in self.pairs]
+        params = urlencode({
+            "instruments": ",".join(pairs_oanda), "accountId": self.account_id
+        })
+        return (
+            "GET /v3/accounts/%s/pricing/stream?%s HTTP/1.1\r\n"
+            "Host: %s\r\n"
+            "Authorization: Bearer %s\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Connection: keep-alive\r\n\r\n" % (
+                self.account_id, params, self.domain, self.access_token
+            )
+        ).encode("ascii")
+
+    async def _connect(self):
+        """
+        Opens the connection, sends the stream request and reads the
+        response status and headers.
+        """
+        ssl_context = ssl.create_default_context() if self.use_ssl else None
+        reader, writer = await asyncio.open_connection(
+            self.domain, self.port, ssl=ssl_context, limit=self.read_size
+        )
+        writer.write(self._request())
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            writer.close()
+            raise ConnectionError("Connection closed before the response status")
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            writer.close()
+            raise ConnectionError("Malformed response status %r" % status_line[:200])
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return reader, writer, status, headers
+
+    async def _read_body(self, reader, headers):
+        """
+        Yields the response body in chunks, decoding the chunked
+        transfer encoding if it is used.
+        """
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                if not size_line:
+                    raise ConnectionError("Price stream closed mid-chunk")
+                size = int(size_line.split(b";")[0].strip(), 16)
+                if size == 0:
+                    return
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield data
+        else:
+            while True:
+                data = await reader.read(self.read_size)
+                if not data:
+                    return
+                yield data
+
+    async def _watchdog(self, writer):
+        """
+        Aborts the connection when the heartbeats stop arriving.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_timeout / 4.0)
+            silence = time.monotonic() - self.last_heartbeat
+            if silence > self.heartbeat_timeout:
+                print("No price stream heartbeat for %.1fs, reconnecting" % silence)
+                writer.transport.abort()
+                return
+
+    async def _stream_once(self, lines):
+        """
+        Streams from a single connection until it ends, placing
+        the complete lines of every chunk onto the lines buffer.
+        """
+        reader, writer, status, headers = await self._connect()
+        watchdog = None
+        try:
+            if status != 200:
+                body = await reader.read(self.read_size)
+                print("Price stream returned status %s: %s" % (status, body[:200]))
+                return
+            self.last_heartbeat = time.monotonic()
+            watchdog = asyncio.ensure_future(self._watchdog(writer))
+            buffer = b""
+            async for data in self._read_body(reader, headers):
+                buffer += data
+                complete = buffer.split(b"\n")
+                buffer = complete.pop()
+                if any(b'"HEARTBEAT"' in line for line in complete):
+                    self.last_heartbeat = time.monotonic()
+                if complete:
+                    self.received = True
+                    # Stamped on receipt, before any wait in the buffer
+                    await lines.put((time.time_ns(), complete))
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            writer.close()
+
+    async def _put_event(self, event):
+        while self.max_pending and self.events_queue.qsize() >= self.max_pending:
+            await asyncio.sleep(self.pending_interval)
+        try:
+            self.events_queue.put_nowait(event)
+        except queue.Full:
+            await self.loop.run_in_executor(None, self.events_queue.put, event)
+
+    async def _consume(self, lines):
+        """
+        Decodes each buffered batch of lines, which a capture records
+        with the time it was received, and places a TickEvent onto
+        the events queue for each price message.
+        """
+        while True:
+            received_ns, batch = await lines.get()
+            for tick_event in self.on_lines(batch, received_ns):
+                await self._put_event(tick_event)
+
+    def _start_consumer(self, lines):
+        self.consumer = asyncio.ensure_future(self._consume(lines))
+        self.consumer.add_done_callback(lambda task: self._consumer_done(task, lines))
+
+    def _consumer_done(self, task, lines):
+        """
+        Restarts the consumer if it failed while the stream is running,
+        as otherwise the lines buffer would fill up and stop the stream.
+        """
+        if task.cancelled() or not self.running:
+            return
+        print("Caught exception when handling the oanda price stream\n%r" % task.exception())
+        self._start_consumer(lines)
+
+    async def stream(self):
+        """
+        Streams prices onto the events queue, reconnecting with
+        exponential backoff, until stop is called.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.running = True
+        lines = asyncio.Queue(self.buffer_size)
+        self._start_consumer(lines)
+        backoff = self.initial_backoff
+        try:
+            while self.running:
+                self.received = False
+                try:
+                    await self._stream_once(lines)
+                except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                    print("Caught exception on the oanda price stream\n" + str(e))
+                if self.received:
+                    backoff = self.initial_backoff
+                self.reconnects += 1
+                print("Reconnecting to the price stream in %.1fs" % backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        finally:
+            self.running = False
+            self.consumer.cancel()
+            if self.recorder is not None:
+                self.recorder.close()
+
+    def stream_to_queue(self):
+        """
+        Runs the price stream in its own asyncio event loop, so it
+        can be used as a thread target just like StreamingForexPrices.
+        """
+        try:
+            asyncio.run(self.stream())
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self):
+        """
+        Stops the price stream from any thread.
+        """
+        self.running = False
+        if self.loop is not None and self.task is not None:
+            self.loop.call_soon_threadsafe(self.task.cancel)
@@ -0,0 +1,103 @@
+import datetime
+
+import numpy as np
+
+from Events.BarEvent import BarEvent
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+# The columns of the bar history ring buffers, after the bar time
+BAR_COLUMNS = (
+    "open_bid", "high_bid", "low_bid", "close_bid",
+    "open_ask", "high_ask", "low_ask", "close_ask", "volume"
+)
+
+
+class BarAggregator(object):
+    """
+    Aggregates the ticks of every pair into OHLC bid/ask bars with a
+    tick volume, for several timeframes (in seconds) at once, and
+    places a BarEvent onto the events queue each time a bar closes.
+    A bar closes when the first tick of the following bar arrives,
+    so strategies that handle BAR events instead of TICK events are
+    called once per bar rather than once per tick. Periods without
+    ticks produce no bars.
+    The last "history" closed bars of each pair and timeframe are
+    kept in preallocated numpy ring buffers, see bars.
+    """
+
+    def __init__(self, pairs, events, timeframes=(1, 60, 3600), history=1000):
+        self.pairs = pairs
+        self.events = events
+        self.timeframes = tuple(timeframes)
+        self.steps = tuple(int(tf * 1000000) for tf in self.timeframes)
+        self.history = history
+        # pair -> the open bar of each timeframe, as a list of
+        # [bar index, open/high/low/close bid, open/high/low/close ask, volume]
+        self.current = {p: [None] * len(self.timeframes) for p in pairs}
+        # pair -> per timeframe ring buffers of bar times and values
+        self.times = {
+            p: [np.zeros(history, dtype=np.int64) for _ in self.timeframes] for p in pairs
+        }
+        self.values = {
+            p: [np.zeros((history, len(BAR_COLUMNS))) for _ in self.timeframes] for p in pairs
+        }
+        self.counts = {p: [0] * len(self.timeframes) for p in pairs}
+
+    def on_tick(self, event):
+        pair = event.instrument
+        bid = event.bid
+        ask = event.ask
+        now = (event.time - EPOCH) // MICROSECOND
+        bars = self.current[pair]
+        for i, step in enumerate(self.steps):
+            bar = bars[i]
+            index = now // step
+            if bar is None or index != bar[0]:
+                if bar is not None:
+                    self._close_bar(pair, i, bar, event.origin_ns)
+                bars[i] = [index, bid, bid, bid, bid, ask, ask, ask, ask, 1]
+            else:
+                if bid > bar[2]:
+                    bar[2] = bid
+                elif bid < bar[3]:
+                    bar[3] = bid
+                bar[4] = bid
+                if ask > bar[6]:
+                    bar[6] = ask
+                elif ask < bar[7]:
+                    bar[7] = ask
+                bar[8] = ask
+                bar[9] += 1
+
+    def _close_bar(self, pair, i, bar, origin_ns):
+        """
+        Stores a closed bar in its ring buffer and places it onto
+        the events queue.
+        """
+        start = bar[0] * self.steps[i]
+        slot = self.counts[pair][i] % self.history
+        self.times[pair][i][slot] = start
+        self.values[pair][i][slot] = bar[1:]
+        self.counts[pair][i] += 1
+        self.events.put(BarEvent(
+            pair, self.timeframes[i], EPOCH + datetime.timedelta(microseconds=start),
+            bar[1], bar[2], bar[3], bar[4], bar[5], bar[6], bar[7], bar[8],
+            bar[9], origin_ns
+        ))
+
+    def bars(self, pair, timeframe):
+        """
+        Returns the closed bars held for a pair and timeframe, oldest
+        first, as a tuple of an array of bar start times (datetime64)
+        and a dictionary of BAR_COLUMNS to float arrays.
+        """
+        i = self.timeframes.index(timeframe)
+        count = self.counts[pair][i]
+        if count <= self.history:
+            order = np.arange(count)
+        else:
+            order = (np.arange(self.history) + count) % self.history
+        times = self.times[pair][i][order].astype("M8[us]")
+        values = self.values[pair][i][order]
+        return times, {name: values[:, j] for j, name in enumerate(BAR_COLUMNS)}
@@ -0,0 +1,52 @@
+from Price.PriceHandler import PRICE_CONTEXT, PRICE_QUANTUM
+
+
+class CrossPrice(object):
+    """
+    A read-only prices dictionary entry for a pair that is not
+    streamed, triangulated through a chain of legs (the prices
+    dictionary entries of consecutive pairs, e.g. "CHFUSD" and
+    "USDGBP" for "CHFGBP"). The bid (ask) is the product of the
+    legs' bids (asks), quantized to five decimal places. It is
+    computed when read and cached until one of the legs' prices
+    changes, so ticks of other pairs cost nothing.
+    """
+    __slots__ = ("legs", "_bid_sources", "_ask_sources", "_bid", "_ask")
+
+    def __init__(self, legs):
+        self.legs = legs
+        self._bid_sources = None
+        self._ask_sources = None
+        self._bid = None
+        self._ask = None
+
+    @staticmethod
+    def _product(sources):
+        if None in sources:
+            return None
+        price = sources[0]
+        for leg_price in sources[1:]:
+            price = PRICE_CONTEXT.multiply(price, leg_price)
+        return price.quantize(PRICE_QUANTUM, context=PRICE_CONTEXT)
+
+    @staticmethod
+    def _changed(sources, cached):
+        return cached is None or any(x is not y for x, y in zip(sources, cached))
+
+    def __getitem__(self, key):
+        if key == "bid":
+            sources = tuple([leg["bid"] for leg in self.legs])
+            if self._changed(sources, self._bid_sources):
+                self._bid_sources = sources
+                self._bid = self._product(sources)
+            return self._bid
+        elif key == "ask":
+            sources = tuple([leg["ask"] for leg in self.legs])
+            if self._changed(sources, self._ask_sources):
+                self._ask_sources = sources
+                self._ask = self._product(sources)
+            return self._ask
+        elif key == "time":
+            times = [leg["time"] for leg in self.legs if leg["time"] is not None]
+            return max(times) if times else None
+        raise KeyError(key)
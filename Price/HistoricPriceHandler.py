@@ -0,0 +1,93 @@
+import datetime
+from decimal import Decimal
+
+from Events.TickEvent import TickEvent
+from Price.PriceHandler import PriceHandler
+from Price import TickCache, TickMerge
+import settings
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class HistoricCSVPriceHandler(PriceHandler):
+    """
+    HistoricCSVPriceHandler is designed to read the daily
+    "PAIR_YYYYMMDD.csv" tick files written by Scripts/get_pair.py
+    and stream the ticks of all requested pairs, in time order,
+    onto the events queue.
+    Each CSV is converted once into a binary columnar cache (see
+    Price.TickCache) and afterwards only served from memory-mapped
+    views, so repeated backtests neither re-parse the text files nor
+    hold the full history in RAM. The pairs are interleaved by a
+    lazy heap merge (see Price.TickMerge) which keeps a single open
+    day file per pair.
+    """
+
+    def __init__(self, pairs, events_queue, csv_dir, cache_dir=None):
+        self.pairs = pairs
+        self.events_queue = events_queue
+        self.csv_dir = csv_dir
+        self.cache_dir = cache_dir or settings.TICK_CACHE_DIR
+        self.prices = self._set_up_prices_dict()
+        self.ticks = TickMerge.merge_ticks(self._create_cursors())
+        self.continue_backtest = True
+
+    def _create_cursors(self):
+        """
+        Creates one PairCursor per pair over that pair's daily
+        tick files, in date order.
+        """
+        return [
+            TickMerge.PairCursor(
+                p, [path for _, path in TickCache.pair_files(self.csv_dir, p)],
+                self.cache_dir
+            )
+            for p in self.pairs
+        ]
+
+    @staticmethod
+    def to_decimal(value):
+        """
+        Converts a fixed-point integer price back into a Decimal
+        with five decimal places.
+        """
+        return Decimal(int(value)).scaleb(-TickCache.PRICE_DECIMALS)
+
+    @staticmethod
+    def to_datetime(time_ns):
+        return EPOCH + datetime.timedelta(microseconds=int(time_ns) // 1000)
+
+    def stream_next_tick(self):
+        """
+        Places the next tick, across all pairs, onto the events
+        queue as a TickEvent and updates the prices dictionary
+        (including the inverted pair). Sets continue_backtest to
+        False once every tick file has been exhausted.
+        """
+        try:
+            tick = next(self.ticks)
+        except StopIteration:
+            self.continue_backtest = False
+            return
+
+        pair = tick.pair
+        time = self.to_datetime(tick.time)
+        bid = self.to_decimal(tick.bid)
+        ask = self.to_decimal(tick.ask)
+
+        self.prices[pair]["bid"] = bid
+        self.prices[pair]["ask"] = ask
+        self.prices[pair]["time"] = time
+
+        # Invert the prices (GBP_USD -> USD_GBP)
+        inv_pair, inv_bid, inv_ask = self.invert_prices(pair, bid, ask)
+        self.prices[inv_pair]["bid"] = inv_bid
+        self.prices[inv_pair]["ask"] = inv_ask
+        self.prices[inv_pair]["time"] = time
+
+        tick_event = TickEvent(
+            pair, time, bid, ask,
+            bid_volume=float(tick.bid_volume) / TickCache.VOLUME_SCALE,
+            ask_volume=float(tick.ask_volume) / TickCache.VOLUME_SCALE
+        )
+        self.events_queue.put(tick_event)
@@ -0,0 +1,36 @@
+from Price.PriceHandler import invert_price
+
+
+class InvertedPrice(object):
+    """
+    A read-only stand-in for the prices dictionary entry of an
+    inverted pair (e.g. "USDGBP" for a streamed "GBPUSD"). The
+    reciprocal bid and ask are only computed when they are read,
+    and are cached until the source pair's prices change, so ticks
+    of pairs that no Position converts through cost nothing extra.
+    """
+    __slots__ = ("source", "_bid_source", "_ask_source", "_bid", "_ask")
+
+    def __init__(self, source):
+        self.source = source
+        self._bid_source = None
+        self._ask_source = None
+        self._bid = None
+        self._ask = None
+
+    def __getitem__(self, key):
+        if key == "bid":
+            bid = self.source["bid"]
+            if bid is not self._bid_source:
+                self._bid_source = bid
+                self._bid = None if bid is None else invert_price(bid)
+            return self._bid
+        elif key == "ask":
+            ask = self.source["ask"]
+            if ask is not self._ask_source:
+                self._ask_source = ask
+                self._ask = None if ask is None else invert_price(ask)
+            return self._ask
+        elif key == "time":
+            return self.source["time"]
+        raise KeyError(key)
@@ -0,0 +1,98 @@
+from collections import deque
+from decimal import Decimal
+
+from Price.CrossPrice import CrossPrice
+
+
+class PriceBook(object):
+    """
+    Tracks which of the streamed pairs have yet to be priced, so that
+    checking whether every price is available is O(1), and makes sure
+    that the prices dictionary can convert every quote currency into
+    the home currency.
+    The streamed pairs form a graph of currencies. For a quote
+    currency whose "quote+home" pair is neither streamed nor the
+    inverse of a streamed pair, the shortest chain of pairs to the
+    home currency is found once and a CrossPrice entry, which caches
+    the triangulated rate until one of its legs ticks, is added to
+    the prices dictionary. The home currency itself converts at 1.
+    """
+
+    def __init__(self, pairs, prices, home_currency):
+        self.pairs = pairs
+        self.prices = prices
+        self.home_currency = home_currency
+        self.unpriced = set(pairs)
+        self.graph = self.create_graph(pairs)
+        for pair in pairs:
+            self.add_home_conversion(pair[3:])
+
+    @staticmethod
+    def create_graph(pairs):
+        """
+        Returns a dictionary of each currency to the currencies it
+        can be converted into directly.
+        """
+        graph = {}
+        for pair in pairs:
+            base, quote = pair[:3], pair[3:]
+            graph.setdefault(base, set()).add(quote)
+            graph.setdefault(quote, set()).add(base)
+        return graph
+
+    def find_path(self, currency, target):
+        """
+        Returns the shortest list of currencies from currency to
+        target, or None if they are not connected.
+        """
+        previous = {currency: None}
+        queue = deque([currency])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                return path[::-1]
+            for neighbour in sorted(self.graph.get(current, ())):
+                if neighbour not in previous:
+                    previous[neighbour] = current
+                    queue.append(neighbour)
+        return None
+
+    def add_home_conversion(self, currency):
+        """
+        Adds the prices dictionary entry of the currency+home pair,
+        if it is not already there. Returns False if the currency
+        cannot be converted into the home currency.
+        """
+        pair = "%s%s" % (currency, self.home_currency)
+        if pair in self.prices:
+            return True
+        if currency == self.home_currency:
+            one = Decimal("1.00000")
+            self.prices[pair] = {"bid": one, "ask": one, "time": None}
+            return True
+        path = self.find_path(currency, self.home_currency)
+        if path is None:
+            print("No prices convert %s into %s" % (currency, self.home_currency))
+            return False
+        self.prices[pair] = CrossPrice([
+            self.prices["%s%s" % (a, b)] for a, b in zip(path[:-1], path[1:])
+        ])
+        return True
+
+    def update(self, pair):
+        """
+        Records that a pair has ticked. Once every pair has been
+        priced this is a single truth test.
+        """
+        if self.unpriced and pair in self.unpriced:
+            entry = self.prices[pair]
+            if entry["bid"] is not None and entry["ask"] is not None:
+                self.unpriced.discard(pair)
+
+    @property
+    def ready(self):
+        return not self.unpriced
@@ -1,4 +1,24 @@
-from decimal import Decimal, getcontext, ROUND_HALF_DOWN
+from decimal import Context, Decimal, ROUND_HALF_DOWN
+
+# Prices are quantized to five decimal places, rounding half down,
+# with a private context so the global Decimal context is untouched.
+PRICE_CONTEXT = Context(rounding=ROUND_HALF_DOWN)
+PRICE_QUANTUM = Decimal("0.00001")
+ONE = Decimal("1.0")
+
+
+def quantize_price(price):
+    return Decimal(price).quantize(PRICE_QUANTUM, context=PRICE_CONTEXT)
+
+
+def invert_price(price):
+    """
+    Returns the reciprocal of a price, quantized to five
+    decimal places.
+    """
+    return PRICE_CONTEXT.divide(ONE, price).quantize(
+        PRICE_QUANTUM, context=PRICE_CONTEXT
+    )
 
 
 class PriceHandler(object):
@@ -36,12 +56,5 @@ class PriceHandler(object):
         This will turn the bid/ask of "GBPUSD" into bid/ask for
         "USDGBP" and place them in the prices dictionary.
         """
-        getcontext().rounding = ROUND_HALF_DOWN
         inv_pair = "%s%s" % (pair[3:], pair[:3])
-        inv_bid = (Decimal("1.0") / bid).quantize(
-            Decimal("0.00001")
-        )
-        inv_ask = (Decimal("1.0") / ask).quantize(
-            Decimal("0.00001")
-        )
-        return inv_pair, inv_bid, inv_ask
+        return inv_pair, invert_price(bid), invert_price(ask)
@@ -0,0 +1,40 @@
+import time
+
+from Price.StreamingPriceHandler import StreamingForexPrices
+from Price.StreamRecorder import read_capture
+
+
+class ReplayForexPrices(StreamingForexPrices):
+    """
+    Replays a price stream recorded by StreamRecorder through the
+    same decoding and TickEvent path as the live StreamingForexPrices,
+    so that a live session can be reproduced offline or used to load
+    test the trading loop.
+    With speed=None the capture is replayed as fast as possible,
+    otherwise the original gaps between received chunks are kept,
+    scaled by 1/speed (speed=1.0 is wall-clock speed).
+    """
+
+    def __init__(self, capture_file, pairs, events_queue, speed=None):
+        super(ReplayForexPrices, self).__init__(
+            None, None, None, pairs, events_queue
+        )
+        self.capture_file = capture_file
+        self.speed = speed
+        self.ticks = 0
+        self.finished = False
+
+    def stream_to_queue(self):
+        start = time.perf_counter()
+        first_ns = None
+        for received_ns, lines in read_capture(self.capture_file):
+            if self.speed:
+                if first_ns is None:
+                    first_ns = received_ns
+                delay = (received_ns - first_ns) / 1e9 / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            for tick_event in self.on_lines(lines):
+                self.events_queue.put(tick_event)
+                self.ticks += 1
+        self.finished = True
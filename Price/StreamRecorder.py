@@ -0,0 +1,51 @@
+import gzip
+import time
+
+
+class StreamRecorder(object):
+    """
+    Appends the raw lines of a live price stream to a gzip
+    compressed capture file. Every line is prefixed with the
+    wall-clock time (in nanoseconds since the epoch) at which
+    its chunk was received, separated by a tab, so that a session
+    can later be replayed with its original timing by
+    ReplayForexPrices. Appending to an existing capture adds a new
+    gzip member, which is read back transparently.
+    """
+
+    def __init__(self, capture_file):
+        self.capture_file = capture_file
+        self.out_file = gzip.open(capture_file, "ab")
+
+    def write(self, lines, received_ns=None):
+        """
+        Records a batch of lines received together, at received_ns
+        nanoseconds since the epoch or, by default, now.
+        """
+        stamp = b"%d\t" % (received_ns if received_ns is not None else time.time_ns())
+        self.out_file.write(b"".join(
+            stamp + line.rstrip(b"\r") + b"\n" for line in lines if line.strip()
+        ))
+
+    def close(self):
+        self.out_file.close()
+
+
+def read_capture(capture_file):
+    """
+    Yields (received_ns, lines) for every batch of lines that was
+    received together in a capture file.
+    """
+    batch_ns = None
+    batch = []
+    with gzip.open(capture_file, "rb") as f:
+        for record in f:
+            stamp, _, line = record.rstrip(b"\n").partition(b"\t")
+            received_ns = int(stamp)
+            if received_ns != batch_ns and batch:
+                yield batch_ns, batch
+                batch = []
+            batch_ns = received_ns
+            batch.append(line)
+    if batch:
+        yield batch_ns, batch
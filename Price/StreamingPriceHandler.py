@@ -1,22 +1,33 @@
 import requests
 import json
-from decimal import Decimal, getcontext, ROUND_HALF_DOWN
+from time import monotonic_ns
 
 from Events.TickEvent import TickEvent
-from Price.PriceHandler import PriceHandler
+from Price.InvertedPrice import InvertedPrice
+from Price.PriceHandler import PriceHandler, quantize_price
+from Price.StreamRecorder import StreamRecorder
 
 
 class StreamingForexPrices(PriceHandler):
     def __init__(
             self, domain, access_token,
-            account_id, pairs, events_queue
+            account_id, pairs, events_queue,
+            capture_file=None
     ):
+        """
+        When capture_file is given, every raw line received from the
+        stream is also appended to it by a StreamRecorder.
+        """
         self.domain = domain
         self.access_token = access_token
         self.account_id = account_id
         self.pairs = pairs
         self.prices = self._set_up_prices_dict()
         self.events_queue = events_queue
+        self.instruments = {"%s_%s" % (p[:3], p[3:]): p for p in self.pairs}
+        self.recorder = StreamRecorder(capture_file) if capture_file else None
+        # Set to True to stamp ticks with their arrival time (see Metrics.Latency)
+        self.stamp_ticks = False
 
     def connect_to_stream(self):
         global stream
@@ -35,51 +46,86 @@ class StreamingForexPrices(PriceHandler):
             stream.close()
             print("Caught exception when connecting to oanda price stream\n" + str(e))
 
-    def invert_prices(self, pair, bid, ask):
+    def _set_up_prices_dict(self):
+        """
+        As PriceHandler._set_up_prices_dict, except that the entries
+        of the inverted pairs are InvertedPrice objects which compute
+        the reciprocal prices lazily, only when they are read.
+        """
+        prices_dict = {p: {"bid": None, "ask": None, "time": None} for p in self.pairs}
+        for p in self.pairs:
+            prices_dict["%s%s" % (p[3:], p[:3])] = InvertedPrice(prices_dict[p])
+        return prices_dict
+
+    @staticmethod
+    def decode_lines(lines):
+        """
+        Decodes a batch of complete stream lines with a single
+        json.loads call, falling back to decoding line by line (and
+        skipping the malformed lines) if the batch fails to parse.
+        """
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return []
+        try:
+            return json.loads(b"[" + b",".join(lines) + b"]")
+        except ValueError:
+            messages = []
+            for line in lines:
+                try:
+                    messages.append(json.loads(line))
+                except ValueError as e:
+                    print("Caught exception when converting message into json\n" + str(e))
+            return messages
+
+    def on_price(self, message, origin_ns=0):
+        """
+        Updates the prices dictionary from an OANDA price message
+        and returns its TickEvent.
+        """
+        instrument = self.instruments[message["instrument"]]
+        time = message["time"]
+        bid = quantize_price(message["bids"][0]["price"])
+        ask = quantize_price(message["asks"][0]["price"])
+        prices = self.prices[instrument]
+        prices["bid"] = bid
+        prices["ask"] = ask
+        prices["time"] = time
+        return TickEvent(instrument, time, bid, ask, origin_ns)
+
+    def on_lines(self, lines, received_ns=None):
         """
-        Simply inverts the prices for a particular currency pair.
-        This will turn the bid/ask of "GBPUSD" into bid/ask for
-        "USDGBP" and place them in the prices dictionary.
+        Decodes a batch of stream lines and returns the TickEvents
+        of the price messages amongst them. received_ns is the epoch
+        time at which the lines arrived, if not now, for the capture.
+        A price message which cannot be read (such as one without bids,
+        or of an instrument that was not requested) is skipped.
         """
-        getcontext().rounding = ROUND_HALF_DOWN
-        inv_pair = "%s%s" % (pair[3:], pair[:3])
-        inv_bid = (Decimal("1.0")/bid).quantize(
-            Decimal("0.00001")
-        )
-        inv_ask = (Decimal("1.0")/ask).quantize(
-            Decimal("0.00001")
-        )
-        return inv_pair, inv_bid, inv_ask
+        origin_ns = monotonic_ns() if self.stamp_ticks else 0
+        if self.recorder is not None:
+            self.recorder.write(lines, received_ns)
+        tick_events = []
+        for message in self.decode_lines(lines):
+            if not isinstance(message, dict) or "instrument" not in message:
+                continue
+            try:
+                tick_events.append(self.on_price(message, origin_ns))
+            except (KeyError, IndexError, TypeError, ArithmeticError) as e:
+                print("Skipped malformed price message %.200s\n%r" % (message, e))
+        return tick_events
 
     def stream_to_queue(self):
         response = self.connect_to_stream()
         if response.status_code != 200:
             return
-        for line in response.iter_lines(1):
-            if line:
-                try:
-                    message = json.loads(line)
-                    print(message)
-                except Exception as e:
-                    print("Caught exception when converting message into json\n" + str(e))
-                    return
-                if "instrument" in message or "tick" in message:
-                    getcontext().rounding = ROUND_HALF_DOWN
-                    instrument = message["instrument"].replace("_", "")
-                    time = message["time"]
-                    bid = Decimal(message["bids"][0]["price"]).quantize(
-                        Decimal("0.00001")
-                    )
-                    ask = Decimal(message["asks"][0]["price"]).quantize(
-                        Decimal("0.00001")
-                    )
-                    self.prices[instrument]["bid"] = bid
-                    self.prices[instrument]["ask"] = ask
-
-                    # Invert the prices (GBP_USD -> USD_GBP)
-                    inv_pair, inv_bid, inv_ask = self.invert_prices(instrument, bid, ask)
-                    self.prices[inv_pair]["bid"] = inv_bid
-                    self.prices[inv_pair]["ask"] = inv_ask
-                    self.prices[inv_pair]["time"] = time
-                    tick_event = TickEvent(instrument, time, bid, ask)
+        buffer = b""
+        try:
+            for data in response.iter_content(chunk_size=65536):
+                buffer += data
+                lines = buffer.split(b"\n")
+                buffer = lines.pop()
+                for tick_event in self.on_lines(lines):
                     self.events_queue.put(tick_event)
+        finally:
+            if self.recorder is not None:
+                self.recorder.close()
@@ -0,0 +1,148 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Prices are stored as fixed-point integers with five decimal places,
+# the same precision that the rest of the system quantizes to.
+PRICE_SCALE = 100000
+PRICE_DECIMALS = 5
+# Volumes are written by Scripts/get_pair.py with two decimal places.
+VOLUME_SCALE = 100
+
+CSV_TIME_FORMAT = "%d.%m.%Y %H:%M:%S.%f"
+COLUMNS = ("time", "bid", "ask", "bid_volume", "ask_volume")
+
+TickColumns = namedtuple("TickColumns", COLUMNS)
+
+
+def pair_files(csv_dir, pair):
+    """
+    Returns a list of (date_string, path) tuples for every
+    "PAIR_YYYYMMDD.csv" file of the given pair in csv_dir,
+    sorted by date.
+    """
+    pattern = re.compile(r"^%s_(\d{8})\.csv$" % re.escape(pair))
+    files = []
+    for filename in os.listdir(csv_dir):
+        match = pattern.match(filename)
+        if match:
+            files.append((match.group(1), os.path.join(csv_dir, filename)))
+    return sorted(files)
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {"path": os.path.realpath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def cache_path_for(csv_path, cache_dir, stamp=None):
+    """
+    Returns the cache directory of a tick CSV file, named after the
+    file and a hash of its real path, size and modification time,
+    so that files of the same name in different directories, or a
+    file that has changed, never share a cache.
+    """
+    stamp = stamp or _source_stamp(csv_path)
+    key = hashlib.sha256(json.dumps(stamp, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, "%s_%s" % (name, key))
+
+
+def _is_fresh(cache_path, stamp):
+    meta_file = os.path.join(cache_path, "meta.json")
+    if not os.path.exists(meta_file):
+        return False
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return meta.get("source") == stamp
+
+
+def convert_csv(csv_path, cache_path):
+    """
+    Parses a tick CSV file once and writes each column into its own
+    .npy file in cache_path. Times are stored as int64 nanoseconds
+    since the epoch and prices/volumes as int64 fixed-point values.
+    Every file is written to a temporary file and then renamed into
+    place, so that arrays which another process has memory-mapped
+    are never truncated, and meta.json is written last so that an
+    interrupted conversion is never mistaken for a valid cache.
+    """
+    df = pd.read_csv(csv_path, header=0)
+    times = pd.to_datetime(df["Time"], format=CSV_TIME_FORMAT)
+    columns = {
+        "time": times.values.astype("datetime64[ns]").astype(np.int64),
+        "bid": np.rint(df["Bid"].values * PRICE_SCALE).astype(np.int64),
+        "ask": np.rint(df["Ask"].values * PRICE_SCALE).astype(np.int64),
+        "bid_volume": np.rint(df["BidVolume"].values * VOLUME_SCALE).astype(np.int64),
+        "ask_volume": np.rint(df["AskVolume"].values * VOLUME_SCALE).astype(np.int64),
+    }
+    if not os.path.exists(cache_path):
+        os.makedirs(cache_path)
+    for name in COLUMNS:
+        path = os.path.join(cache_path, "%s.npy" % name)
+        with open(_temp_path(path), "wb") as f:
+            np.save(f, columns[name])
+        os.replace(_temp_path(path), path)
+    meta_file = os.path.join(cache_path, "meta.json")
+    with open(_temp_path(meta_file), "w") as f:
+        json.dump({"source": _source_stamp(csv_path), "rows": len(df)}, f)
+    os.replace(_temp_path(meta_file), meta_file)
+
+
+def _temp_path(path):
+    return "%s.%d.tmp" % (path, os.getpid())
+
+
+def _remove_stale(csv_path, cache_path):
+    """
+    Removes the caches of earlier versions of a tick CSV file. Memory
+    maps of their arrays stay valid after the files are removed.
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    source = os.path.realpath(csv_path)
+    for path in glob.glob(os.path.join(os.path.dirname(cache_path), "%s_*" % name)):
+        if path == cache_path:
+            continue
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                stale = json.load(f)["source"]["path"] == source
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_ticks(csv_path, cache_dir):
+    """
+    Returns a TickColumns tuple of read-only memory-mapped arrays for
+    the given tick CSV file, converting it into the binary columnar
+    cache first if the cache is missing or older than the CSV.
+    """
+    stamp = _source_stamp(csv_path)
+    cache_path = cache_path_for(csv_path, cache_dir, stamp)
+    if not _is_fresh(cache_path, stamp):
+        convert_csv(csv_path, cache_path)
+        _remove_stale(csv_path, cache_path)
+    return TickColumns(*[
+        np.load(os.path.join(cache_path, "%s.npy" % c), mmap_mode="r")
+        for c in COLUMNS
+    ])
+
+
+def build_cache(csv_dir, pairs, cache_dir):
+    """
+    Converts the tick files of every pair in csv_dir into the binary
+    cache up front. Processes started afterwards only memory-map the
+    cached arrays, so they share the same read-only pages through the
+    operating system's page cache rather than parsing the CSVs again.
+    """
+    for pair in pairs:
+        for _, path in pair_files(csv_dir, pair):
+            load_ticks(path, cache_dir)
@@ -0,0 +1,78 @@
+import heapq
+from collections import namedtuple
+
+from Price import TickCache
+
+Tick = namedtuple(
+    "Tick", ("pair", "time", "bid", "ask", "bid_volume", "ask_volume")
+)
+
+
+class PairCursor(object):
+    """
+    A read position over the daily tick files of a single currency
+    pair. Only the file currently being read is memory-mapped; the
+    next day's file is opened lazily once the current one has been
+    exhausted, so the cursor's footprint does not grow with the
+    number of days in the backtest.
+    Values are the raw fixed-point integers of Price.TickCache.
+    """
+
+    def __init__(self, pair, paths, cache_dir):
+        self.pair = pair
+        self.paths = paths
+        self.cache_dir = cache_dir
+        self.file_index = 0
+        self.ticks = None
+        self.pos = -1
+        self.length = 0
+
+    def advance(self):
+        """
+        Moves the cursor to the next tick. Returns False once every
+        file of the pair has been consumed.
+        """
+        self.pos += 1
+        while self.pos >= self.length:
+            if self.file_index >= len(self.paths):
+                self.ticks = None
+                return False
+            self.ticks = TickCache.load_ticks(
+                self.paths[self.file_index], self.cache_dir
+            )
+            self.file_index += 1
+            self.length = len(self.ticks.time)
+            self.pos = 0
+        return True
+
+    @property
+    def time(self):
+        return self.ticks.time[self.pos]
+
+    def current(self):
+        t = self.ticks
+        i = self.pos
+        return Tick(
+            self.pair, t.time[i], t.bid[i], t.ask[i],
+            t.bid_volume[i], t.ask_volume[i]
+        )
+
+
+def merge_ticks(cursors):
+    """
+    Lazily merges the tick streams of several PairCursors into a
+    single stream ordered by timestamp, using a heap holding one
+    entry per cursor. Ties are broken by the cursor's position in
+    the list, so the merge is stable with respect to pair order.
+    Yields Tick tuples.
+    """
+    heap = [(c.time, i) for i, c in enumerate(cursors) if c.advance()]
+    heapq.heapify(heap)
+    while heap:
+        i = heap[0][1]
+        cursor = cursors[i]
+        yield cursor.current()
+        if cursor.advance():
+            heapq.heapreplace(heap, (cursor.time, i))
+        else:
+            heapq.heappop(heap)
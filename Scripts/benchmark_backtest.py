@@ -0,0 +1,206 @@
+from __future__ import print_function
+
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from decimal import Decimal
+
+from Backtest.Backtest import Backtest
+from Events.EventLoop import EventLoop
+from Execution.ExecutionHandler import SimulatedExecution
+from Metrics.Latency import LatencyRecorder
+from Portfolio.Portfolio import Portfolio
+from Price import TickCache
+from Price.HistoricPriceHandler import HistoricCSVPriceHandler
+from Scripts.get_pair import generate_month, months_between, MU_DT
+from Strategies.SMACrossoverStrategy import MovingAverageCrossStrategy
+from Strategies.Strategy import TestStrategy
+import settings
+
+# Every pair is quoted in USD so that, together with GBPUSD, each
+# one can be converted into the GBP home currency of the Portfolio.
+BASE_CURRENCIES = (
+    "GBP", "EUR", "AUD", "NZD", "CAD", "CHF", "JPY", "SEK", "NOK", "DKK",
+    "SGD", "HKD", "MXN", "ZAR", "TRY", "PLN", "CZK", "HUF", "CNH", "INR"
+)
+# Weekdays from the start of January 2014
+PERIODS = {"1d": 1, "1w": 5, "1m": 22, "3m": 65}
+STRATEGIES = {
+    "test": (TestStrategy, {}),
+    "sma": (MovingAverageCrossStrategy, {})
+}
+
+
+def benchmark_pairs(count):
+    return ["%sUSD" % c for c in BASE_CURRENCIES[:count]]
+
+
+def generate_data(pairs, months, data_dir, seed, mu_dt):
+    """
+    Generates the tick files of every pair and month that are not
+    already in data_dir. Pairs are generated independently, so a
+    pair's files are the same in every benchmark case.
+    """
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+    with multiprocessing.Pool() as pool:
+        jobs = []
+        for year, month in months:
+            prefix = "%04d%02d" % (year, month)
+            for pair in pairs:
+                if not any(date.startswith(prefix) for date, _ in TickCache.pair_files(data_dir, pair)):
+                    jobs.append(pool.apply_async(
+                        generate_month, ([pair], year, month, seed),
+                        {"output_dir": data_dir, "mu_dt": mu_dt}
+                    ))
+        for job in jobs:
+            job.get()
+
+
+def case_dir(data_dir, pairs, days, path):
+    """
+    Links the first days tick files of each pair into their own
+    directory, as the price handler reads every file of a pair.
+    """
+    if not os.path.exists(path):
+        os.makedirs(path)
+    for pair in pairs:
+        for _, source in TickCache.pair_files(data_dir, pair)[:days]:
+            target = os.path.join(path, os.path.basename(source))
+            if not os.path.exists(target):
+                os.symlink(os.path.abspath(source), target)
+    return path
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def run_case(strategy_name, pairs, csv_dir, output_dir):
+    """
+    Runs one backtest, in a fresh process so that its peak RSS is
+    its own, and returns its throughput and the time spent in each
+    event handler and in the price handler.
+    """
+    strategy, params = STRATEGIES[strategy_name]
+    latency = LatencyRecorder(report_interval=float("inf"))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        backtest = Backtest(
+            pairs, HistoricCSVPriceHandler, strategy, params,
+            Portfolio, SimulatedExecution, equity=Decimal("100000.00"),
+            csv_dir=csv_dir, output_dir=output_dir
+        )
+        event_loop = EventLoop(backtest.events, backtest.event_loop.handlers, latency=latency)
+        backtest.event_loop = event_loop
+        start = time.perf_counter()
+        backtest.simulate_trading()
+        elapsed = time.perf_counter() - start
+
+    components = {
+        stage: h.total / 1e9 for stage, h in latency.stages.items()
+        if not stage.endswith(".wait")
+    }
+    # The rest of the run, including the event loop's own overhead
+    components["price_handler"] = max(elapsed - event_loop.busy_time, 0.0)
+    ticks = max(h.count for stage, h in latency.stages.items() if stage.startswith("TICK."))
+    return {
+        "ticks": ticks,
+        "events": event_loop.dispatched,
+        "seconds": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "components": components
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    """
+    Benchmarks the backtest on deterministic synthetic tick data for
+    every combination of strategy, number of pairs and period, and
+    writes the results to a JSON file so that they can be compared
+    across commits.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark backtest throughput.')
+    parser.add_argument('--strategies', type=str, default="test,sma", help='any of test,sma')
+    parser.add_argument('--pairs', type=str, default="1,5,20", help='numbers of pairs')
+    parser.add_argument('--periods', type=str, default="1d,1w,1m,3m", help='any of 1d,1w,1m,3m')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tick-ms', type=float, default=MU_DT, help='mean milliseconds between ticks')
+    parser.add_argument('--data-dir', type=str, default=os.path.join(settings.CSV_DATA_DIR, "benchmark"))
+    parser.add_argument('--output', type=str, default=None,
+                        help='defaults to a timestamped file in OUTPUT_RESULTS_DIR')
+    args = parser.parse_args()
+
+    strategies = args.strategies.split(",")
+    pair_counts = [int(n) for n in args.pairs.split(",")]
+    periods = args.periods.split(",")
+    max_days = max(PERIODS[p] for p in periods)
+    months = months_between("201401", "201401" if max_days <= 22 else "201403")
+    all_pairs = benchmark_pairs(max(pair_counts))
+    data_dir = os.path.join(args.data_dir, "seed%d_%gms" % (args.seed, args.tick_ms))
+
+    print("Generating data in %s..." % data_dir)
+    generate_data(all_pairs, months, data_dir, args.seed, args.tick_ms)
+    TickCache.build_cache(data_dir, all_pairs, settings.TICK_CACHE_DIR)
+
+    started = datetime.datetime.now()
+    output = args.output or os.path.join(
+        settings.OUTPUT_RESULTS_DIR, "benchmark_%s.json" % started.strftime("%Y%m%d_%H%M%S")
+    )
+    results = {
+        "started": started.isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "tick_ms": args.tick_ms,
+        "cases": []
+    }
+    # Each case runs alone in a new process, one at a time
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for period in periods:
+            for count in pair_counts:
+                pairs = all_pairs[:count]
+                csv_dir = case_dir(
+                    data_dir, pairs, PERIODS[period],
+                    os.path.join(data_dir, "cases", "%s_%d" % (period, count))
+                )
+                for strategy_name in strategies:
+                    output_dir = os.path.join(settings.OUTPUT_RESULTS_DIR, "benchmark", "%s_%d_%s" % (
+                        period, count, strategy_name
+                    ))
+                    case = pool.apply(run_case, (strategy_name, pairs, csv_dir, output_dir))
+                    case.update({"strategy": strategy_name, "pairs": count, "period": period})
+                    results["cases"].append(case)
+                    print("%s, %d pairs, %s: %d ticks, %.0f ticks/s, peak RSS %.0f MB" % (
+                        strategy_name, count, period, case["ticks"],
+                        case["ticks_per_second"], case["peak_rss_mb"]
+                    ))
+
+    output_dir = os.path.dirname(output)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print("Results written to %s" % output)
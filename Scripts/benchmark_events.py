@@ -0,0 +1,68 @@
+from __future__ import print_function
+
+import argparse
+import timeit
+import tracemalloc
+
+from Events.Event import EventType
+from Events.TickEvent import TickEvent
+
+
+class DictTickEvent(object):
+    """
+    The previous TickEvent layout, with a per-instance __dict__ and
+    the type stored on every instance, kept here as the baseline.
+    """
+    def __init__(self, instrument, time, bid, ask):
+        self.type = 'TICK'
+        self.instrument = instrument
+        self.time = time
+        self.bid = bid
+        self.ask = ask
+
+
+def run(event_class, ticks):
+    """
+    Creates ticks events of the given class and dispatches each one
+    on its type, reading the attributes a strategy would read.
+    """
+    total = 0.0
+    for i in range(ticks):
+        event = event_class("GBPUSD", i, 1.50000, 1.50020)
+        event_type = event.type
+        if event_type == EventType.TICK:
+            total += event.bid
+        elif event_type == EventType.SIGNAL:
+            pass
+    return total
+
+
+def bytes_per_event(event_class, ticks):
+    """
+    Returns the average memory held by each of ticks live events.
+    """
+    tracemalloc.start()
+    events = [event_class("GBPUSD", i, 1.50000, 1.50020) for i in range(ticks)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return float(size) / len(events)
+
+
+if __name__ == "__main__":
+    """
+    A micro-benchmark of event creation and dispatch, reporting
+    events per second and memory per event for the previous
+    dict-based events and the current slotted events.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark tick event creation and dispatch.')
+    parser.add_argument('--ticks', type=int, default=1000000, help='events per repeat')
+    parser.add_argument('--repeat', type=int, default=5, help='number of repeats')
+    args = parser.parse_args()
+
+    for name, event_class in (("dict", DictTickEvent), ("slots", TickEvent)):
+        best = min(timeit.repeat(
+            lambda: run(event_class, args.ticks), number=1, repeat=args.repeat
+        ))
+        print("%s: %.0f events/s, %.0f bytes/event" % (
+            name, args.ticks / best, bytes_per_event(event_class, 100000)
+        ))
@@ -0,0 +1,107 @@
+from __future__ import print_function
+
+import argparse
+import json
+import time
+from decimal import Decimal, getcontext, ROUND_HALF_DOWN
+
+from Price import StreamRecorder
+from Price.StreamingPriceHandler import StreamingForexPrices
+
+
+def read_capture(path):
+    """
+    Reads the raw lines of a price stream captured by a
+    StreamRecorder, without their receipt timestamps.
+    """
+    return b"".join(
+        line + b"\n" for _, lines in StreamRecorder.read_capture(path) for line in lines
+    )
+
+
+def synthetic_capture(pairs, ticks):
+    """
+    Generates a stream of OANDA v3 price messages, with a
+    heartbeat every 100 ticks, for when no capture is available.
+    """
+    lines = []
+    for i in range(ticks):
+        pair = pairs[i % len(pairs)]
+        price = 1.10000 + (i % 1000) * 0.00001
+        lines.append(json.dumps({
+            "type": "PRICE", "instrument": "%s_%s" % (pair[:3], pair[3:]),
+            "time": "2018-01-01T00:00:%09.6fZ" % (i % 60000 / 1000.0),
+            "bids": [{"price": "%.5f" % price, "liquidity": 10000000}],
+            "asks": [{"price": "%.5f" % (price + 0.0002), "liquidity": 10000000}]
+        }))
+        if i % 100 == 0:
+            lines.append('{"type":"HEARTBEAT","time":"2018-01-01T00:00:00.000000Z"}')
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def per_line(handler, data, chunk_size):
+    """
+    The previous decoding path: every line is decoded on its own
+    and the inverted prices are computed eagerly for every tick.
+    """
+    ticks = 0
+    buffer = b""
+    for data in chunks(data, chunk_size):
+        buffer += data
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if not line:
+                continue
+            message = json.loads(line)
+            if "instrument" in message:
+                getcontext().rounding = ROUND_HALF_DOWN
+                instrument = message["instrument"].replace("_", "")
+                bid = Decimal(message["bids"][0]["price"]).quantize(Decimal("0.00001"))
+                ask = Decimal(message["asks"][0]["price"]).quantize(Decimal("0.00001"))
+                handler.invert_prices(instrument, bid, ask)
+                ticks += 1
+    return ticks
+
+
+def batched(handler, data, chunk_size):
+    """
+    The current decoding path: the complete lines of each chunk
+    are decoded as one batch and inverted prices are left lazy.
+    """
+    ticks = 0
+    buffer = b""
+    for data in chunks(data, chunk_size):
+        buffer += data
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        ticks += len(handler.on_lines(lines))
+    return ticks
+
+
+if __name__ == "__main__":
+    """
+    Replays a recorded price stream (or a synthetic one) through
+    the previous and the current tick decoding paths and reports
+    the ticks decoded per second of each.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark OANDA stream decoding.')
+    parser.add_argument('--capture', type=str, default=None, help='a stream captured by a StreamRecorder')
+    parser.add_argument('--pairs', type=str, default="EURUSD,GBPUSD", help='comma separated pairs')
+    parser.add_argument('--ticks', type=int, default=200000, help='synthetic ticks if no capture')
+    parser.add_argument('--chunk-size', type=int, default=4096, help='bytes per received chunk')
+    args = parser.parse_args()
+
+    pairs = args.pairs.split(",")
+    data = read_capture(args.capture) if args.capture else synthetic_capture(pairs, args.ticks)
+    handler = StreamingForexPrices(None, None, None, pairs, None)
+
+    for name, decode in (("per-line", per_line), ("batched", batched)):
+        start = time.perf_counter()
+        ticks = decode(handler, data, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        print("%s: %d ticks, %.0f ticks/s" % (name, ticks, ticks / elapsed))
@@ -0,0 +1,19 @@
+from __future__ import print_function
+
+import argparse
+
+from Portfolio.EquityRecorder import EquityRecorder
+import settings
+
+if __name__ == "__main__":
+    """
+    Exports the binary equity curve recorded by a backtest
+    to a CSV file.
+    """
+    parser = argparse.ArgumentParser(description='Export a recorded equity curve to CSV.')
+    parser.add_argument('--output-dir', type=str, default=settings.OUTPUT_RESULTS_DIR,
+                        help='the backtest output directory')
+    parser.add_argument('--csv', type=str, default=None, help='defaults to equity.csv in the output directory')
+    args = parser.parse_args()
+
+    print("Equity curve exported to %s" % EquityRecorder.to_csv(args.output_dir, args.csv))
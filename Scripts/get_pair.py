@@ -1,23 +1,21 @@
 from __future__ import print_function
 
+import argparse
 import calendar
-import copy
-import datetime
 import os
-import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
-import pandas as pd
 
 import settings
 
-import argparse
-
-parser = argparse.ArgumentParser(description='Process some integers.')
-parser.add_argument('pair', metavar='P', type=str, help='a currency pair given as BBBQQQ')
-parser.add_argument('date', metavar='D', type=str, help='a date given in YYYYMM format')
-
-args = parser.parse_args()
+S0 = 1.5000
+SPREAD = 0.002
+MU_DT = 1400  # Milliseconds
+SIGMA_DT = 100  # Milliseconds
+DAY_MS = 86400000
+LINE_FORMAT = "%s %02d:%02d:%02d.%03d,%0.5f,%0.5f,%0.2f00,%0.2f00"
 
 
 def month_weekdays(year_int, month_int):
@@ -28,63 +26,175 @@ def month_weekdays(year_int, month_int):
     cal = calendar.Calendar()
     return [
         d for d in cal.itermonthdates(year_int, month_int)
-        if d.weekday() < 5 and d.year == year_int
+        if d.weekday() < 5 and d.year == year_int and d.month == month_int
     ]
 
 
+def months_between(start, end):
+    """
+    Returns the (year, month) tuples from start to end inclusive,
+    both given in YYYYMM format.
+    """
+    year, month = int(start[:4]), int(start[4:6])
+    last = (int(end[:4]), int(end[4:6]))
+    months = []
+    while (year, month) <= last:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def job_rng(seed, pairs, year, month):
+    """
+    A random generator seeded from the base seed, the pairs and the
+    month, so every file is reproducible whichever process writes it.
+    """
+    key = zlib.crc32(",".join(pairs).encode("ascii"))
+    return np.random.default_rng([seed, key, year, month])
+
+
+def arrival_times(rng, start_ms, mu_dt=MU_DT, sigma_dt=SIGMA_DT):
+    """
+    Draws the tick times of a day, in milliseconds after midnight,
+    starting start_ms after midnight. Returns the times, the time
+    between each tick and the one before it, and the offset into
+    the next day from which the following day's ticks are drawn.
+    """
+    times = []
+    dts = []
+    t = start_ms
+    while True:
+        n = int((DAY_MS - t) / mu_dt * 1.05) + 100
+        # Times have a resolution of a microsecond
+        dt = np.round(np.abs(rng.normal(mu_dt, sigma_dt, n)) * 1000.0) / 1000.0
+        cum = t + np.cumsum(dt)
+        end = np.searchsorted(cum, DAY_MS)
+        times.append(cum[:end])
+        dts.append(dt[:end])
+        if end < n:
+            return np.concatenate(times), np.concatenate(dts), cum[end] - DAY_MS
+        t = cum[-1]
+
+
+def volatility(rng, times, shock_rate, shock_scale, shock_minutes):
+    """
+    Returns the volatility multiplier of every tick. Shocks arrive at
+    shock_rate per day on average and scale the volatility by
+    shock_scale for shock_minutes.
+    """
+    scale = np.ones(len(times))
+    shocks = rng.poisson(shock_rate) if shock_rate > 0 else 0
+    if shocks:
+        starts = np.sort(rng.uniform(0, DAY_MS, shocks))
+        latest = np.searchsorted(starts, times, side="right") - 1
+        in_shock = (latest >= 0) & (times - starts[np.maximum(latest, 0)] < shock_minutes * 60000.0)
+        scale[in_shock] = shock_scale
+    return scale
+
+
+def correlation_factor(pairs, correlation):
+    """
+    The Cholesky factor of a matrix with the same correlation
+    between every pair of paths.
+    """
+    n = len(pairs)
+    corr = np.full((n, n), correlation)
+    np.fill_diagonal(corr, 1.0)
+    return np.linalg.cholesky(corr)
+
+
+def write_day(path, day, times, ask, bid, ask_volume, bid_volume):
+    """
+    Writes a day of ticks in bulk, in the "Time,Ask,Bid,AskVolume,
+    BidVolume" format, with times truncated to milliseconds.
+    """
+    ms = np.rint(times * 1000.0).astype(np.int64) // 1000
+    date = day.strftime("%d.%m.%Y")
+    rows = zip(
+        (ms // 3600000).tolist(), (ms // 60000 % 60).tolist(), (ms // 1000 % 60).tolist(),
+        (ms % 1000).tolist(), ask.tolist(), bid.tolist(), ask_volume.tolist(), bid_volume.tolist()
+    )
+    with open(path, "w") as outfile:
+        outfile.write("Time,Ask,Bid,AskVolume,BidVolume\n")
+        outfile.write("\n".join([LINE_FORMAT % ((date,) + r) for r in rows]))
+        outfile.write("\n")
+
+
+def generate_month(pairs, year, month, seed=42, correlation=0.0,
+                   shock_rate=0.0, shock_scale=3.0, shock_minutes=30.0,
+                   output_dir=None, mu_dt=MU_DT, sigma_dt=SIGMA_DT):
+    """
+    Creates a CSV file for every weekday of the month and every pair,
+    e.g. "GBPUSD_20150101.csv". Each pair follows a random walk with
+    a fixed spread, starting from S0 at the beginning of the month.
+    Several pairs generated together share their tick times and have
+    correlated increments. Ticks arrive every mu_dt milliseconds on
+    average. Returns the paths written.
+    """
+    output_dir = output_dir or settings.CSV_DATA_DIR
+    rng = job_rng(seed, pairs, year, month)
+    factor = correlation_factor(pairs, correlation)
+    mid = np.full(len(pairs), S0)
+    start_ms = 0.0
+    paths = []
+    for d in month_weekdays(year, month):
+        times, dt, start_ms = arrival_times(rng, start_ms, mu_dt, sigma_dt)
+        scale = volatility(rng, times, shock_rate, shock_scale, shock_minutes)
+        z = rng.standard_normal((len(times), len(pairs))).dot(factor.T)
+        increments = z * (scale * dt / 1000.0 / 86400.0)[:, None]
+        walk = mid + np.cumsum(increments, axis=0)
+        mid = walk[-1]
+        for i, pair in enumerate(pairs):
+            path = os.path.join(output_dir, "%s_%s.csv" % (pair, d.strftime("%Y%m%d")))
+            write_day(
+                path, d, times,
+                walk[:, i] + SPREAD / 2.0, walk[:, i] - SPREAD / 2.0,
+                1.0 + rng.uniform(0.0, 2.0, len(times)), 1.0 + rng.uniform(0.0, 2.0, len(times))
+            )
+            paths.append(path)
+    return paths
+
+
 if __name__ == "__main__":
-    try:
-        pair = args.pair
-        year = int(args.date[:4])
-        month = int(args.date[4:6])
-    except IndexError:
-        print("You need to enter a currency pair, e.g. GBPUSD, as a command line parameter.")
+    """
+    Generates synthetic tick data for one or more pairs and months,
+    one process per pair and month (or per month for correlated pairs).
+    """
+    parser = argparse.ArgumentParser(description='Generate synthetic tick data.')
+    parser.add_argument('pair', metavar='P', type=str,
+                        help='a currency pair given as BBBQQQ, or several separated by commas')
+    parser.add_argument('date', metavar='D', type=str,
+                        help='a month given in YYYYMM format, or a range given as YYYYMM-YYYYMM')
+    parser.add_argument('--seed', type=int, default=42, help='the random seed')
+    parser.add_argument('--correlation', type=float, default=None,
+                        help='generate the pairs together with this correlation between their paths')
+    parser.add_argument('--shock-rate', type=float, default=0.0, help='volatility shocks per day')
+    parser.add_argument('--shock-scale', type=float, default=3.0, help='the volatility multiplier of a shock')
+    parser.add_argument('--shock-minutes', type=float, default=30.0, help='the duration of a shock')
+    parser.add_argument('--processes', type=int, default=None, help='defaults to the number of CPUs')
+    parser.add_argument('--output-dir', type=str, default=settings.CSV_DATA_DIR)
+    args = parser.parse_args()
+
+    pairs = args.pair.split(",")
+    start, _, end = args.date.partition("-")
+    if args.correlation is None:
+        groups = [[p] for p in pairs]
+        correlation = 0.0
     else:
-        np.random.seed(42)  # Fix the randomness
-
-        S0 = 1.5000
-        spread = 0.002
-        mu_dt = 1400  # Milliseconds
-        sigma_dt = 100  # Millseconds
-        ask = copy.deepcopy(S0) + spread / 2.0
-        bid = copy.deepcopy(S0) - spread / 2.0
-        days = month_weekdays(year, month)  # January 2014
-        current_time = datetime.datetime(
-            days[0].year, days[0].month, days[0].day, 0, 0, 0,
-        )
-
-        # Loop over every day in the month and create a CSV file
-        # for each day, e.g. "GBPUSD_20150101.csv"
-        for d in days:
-            print(d.day)
-            current_time = current_time.replace(day=d.day)
-            outfile = open(
-                os.path.join(
-                    settings.CSV_DATA_DIR,
-                    "%s_%s.csv" % (
-                        pair, d.strftime("%Y%m%d")
-                    )
-                ),
-                "w")
-            outfile.write("Time,Ask,Bid,AskVolume,BidVolume\n")
-
-            # Create the random walk for the bid/ask prices
-            # with fixed spread between them
-            while True:
-                dt = abs(np.random.normal(mu_dt, sigma_dt))
-                current_time += datetime.timedelta(0, 0, 0, dt)
-                if current_time.day != d.day:
-                    outfile.close()
-                    break
-                else:
-                    W = np.random.standard_normal() * dt / 1000.0 / 86400.0
-                    ask += W
-                    bid += W
-                    ask_volume = 1.0 + np.random.uniform(0.0, 2.0)
-                    bid_volume = 1.0 + np.random.uniform(0.0, 2.0)
-                    line = "%s,%s,%s,%s,%s\n" % (
-                        current_time.strftime("%d.%m.%Y %H:%M:%S.%f")[:-3],
-                        "%0.5f" % ask, "%0.5f" % bid,
-                        "%0.2f00" % ask_volume, "%0.2f00" % bid_volume
-                    )
-                    outfile.write(line)
+        groups = [pairs]
+        correlation = args.correlation
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        futures = [
+            executor.submit(
+                generate_month, group, year, month, args.seed, correlation,
+                args.shock_rate, args.shock_scale, args.shock_minutes, args.output_dir
+            )
+            for year, month in months_between(start, end or start)
+            for group in groups
+        ]
+        for future in futures:
+            for path in future.result():
+                print(path)
@@ -0,0 +1,59 @@
+from __future__ import print_function
+
+import argparse
+import queue
+import threading
+import time
+from decimal import Decimal
+
+from Execution.ExecutionHandler import SimulatedExecution
+from Metrics.Latency import LatencyRecorder
+from Portfolio.Portfolio import Portfolio
+from Price.ReplayPriceHandler import ReplayForexPrices
+from Scripts.trading import create_event_loop
+from Strategies.SMACrossoverStrategy import MovingAverageCrossStrategy
+from Strategies.Strategy import TestStrategy
+
+parser = argparse.ArgumentParser(description='Replay a recorded price stream through the trading loop.')
+parser.add_argument('capture', type=str, help='a capture file recorded with STREAM_CAPTURE_FILE')
+parser.add_argument('--pairs', type=str, default="EURUSD,GBPUSD", help='comma separated pairs')
+parser.add_argument('--speed', type=float, default=None,
+                    help='replay speed relative to wall-clock time, as fast as possible if omitted')
+parser.add_argument('--strategy', type=str, default="test", choices=["test", "sma"])
+parser.add_argument('--latency', action='store_true', help='record tick-to-order latencies')
+
+
+if __name__ == "__main__":
+    """
+    Replays a captured live session through the same price handler,
+    strategy, portfolio and event loop as Scripts/trading.py, with
+    simulated execution, and reports the throughput of the loop and,
+    with --latency, the tick-to-order latencies.
+    """
+    args = parser.parse_args()
+    events = queue.Queue()
+    pairs = args.pairs.split(",")
+
+    price_stream = ReplayForexPrices(args.capture, pairs, events, speed=args.speed)
+    portfolio = Portfolio(price_stream, events, equity=Decimal("100000.00"), backtest=False)
+    if args.strategy == "sma":
+        strategy = MovingAverageCrossStrategy(pairs, events)
+    else:
+        strategy = TestStrategy(pairs, events)
+    latency = None
+    if args.latency:
+        latency = LatencyRecorder(report_interval=float("inf"))
+        price_stream.stamp_ticks = True
+    event_loop = create_event_loop(events, strategy, portfolio, SimulatedExecution(), latency)
+
+    trade_thread = threading.Thread(target=event_loop.run)
+    start = time.perf_counter()
+    trade_thread.start()
+    price_stream.stream_to_queue()
+    event_loop.stop()
+    trade_thread.join()
+    elapsed = time.perf_counter() - start
+
+    print("Replayed %d ticks in %.3fs (%.0f ticks/s)" % (
+        price_stream.ticks, elapsed, price_stream.ticks / elapsed
+    ))
@@ -1,61 +1,85 @@
 import queue
 import threading
-import time
 from decimal import Decimal
 
-from Execution.ExecutionHandler import Execution
+from Events.Event import EventType
+from Events.EventLoop import EventLoop
+from Execution.AsyncExecutionHandler import AsyncExecution
 from Portfolio.Portfolio import Portfolio
 from Strategies.Strategy import TestStrategy
-from Price.StreamingPriceHandler import StreamingForexPrices
-from settings import STREAM_DOMAIN, API_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID
+from Price.AsyncStreamingPriceHandler import AsyncStreamingForexPrices
+from Metrics.Latency import LatencyRecorder
+from settings import STREAM_DOMAIN, API_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID, STREAM_CAPTURE_FILE
+from settings import LATENCY_INSTRUMENTATION, LATENCY_REPORT_INTERVAL, MAX_PENDING_TICKS
 
-HEARTBEAT = 0.0
+# Seconds to block on the events queue before checking for shutdown
+TIMEOUT = 1.0
+
+
+def create_event_loop(event_queue, trade_strategy, trade_portfolio, trade_execution, latency=None):
+    """
+    Creates the event loop that directs each event to either the
+    strategy component, the portfolio or the execution handler.
+    :param event_queue:
+    :param trade_strategy:
+    :param trade_portfolio:
+    :param trade_execution:
+    :param latency: an optional LatencyRecorder to instrument the loop with
+    :return: the EventLoop
+    """
+
+    def execute_signal(event):
+        print("Sending signal event to portfolio handler: " + str(event))
+        trade_portfolio.execute_signal(event)
+        trade_portfolio.update_portfolio(event)
+
+    def execute_order(event):
+        print("Executing order event: " + str(event))
+        trade_execution.execute_order(event)
+
+    def report_fill(event):
+        print("Order %s for %s %s %s: %s %s" % (
+            event.status, event.side, event.units, event.instrument,
+            event.price, event.message or ""
+        ))
+
+    return EventLoop(event_queue, {
+        EventType.TICK: [trade_strategy.calculate_signals, trade_portfolio.update_portfolio],
+        EventType.SIGNAL: [execute_signal],
+        EventType.ORDER: [execute_order],
+        EventType.FILL: [report_fill]
+    }, timeout=TIMEOUT, latency=latency)
 
 
 def trade(event_queue, trade_strategy, trade_portfolio, trade_execution):
     """
-    Carries out an infinite while loop that polls the
-    events queue and directs each event to either the
-    strategy component of the execution handler. The
-    loop will then pause for "heartbeat" seconds and
-    continue.
+    Blocks on the events queue and dispatches every event until
+    the shutdown sentinel is placed onto the queue.
     :param trade_portfolio:
     :param event_queue:
     :param trade_strategy:
     :param trade_execution:
     :return:
     """
-
-    while True:
-        try:
-            event = event_queue.get(False)
-        except queue.Empty:
-            pass
-        else:
-            if event is not None:
-                if event.type == 'TICK':
-                    trade_strategy.calculate_signals(event)
-                elif event.type == 'SIGNAL':
-                    print("Sending signal event to portfolio handler: " + str(event))
-                    trade_portfolio.execute_signal(event)
-                    trade_portfolio.update_portfolio(event)
-                elif event.type == 'ORDER':
-                    print("Executing order event: " + str(event))
-                    trade_execution.execute_order(event)
-        time.sleep(HEARTBEAT)
+    create_event_loop(event_queue, trade_strategy, trade_portfolio, trade_execution).run()
 
 
 if __name__ == "__main__":
+    # Unbounded, as the event loop places signals and orders onto it: the
+    # price stream stops adding ticks while MAX_PENDING_TICKS are waiting
     events = queue.Queue()
 
     # trading units of EUR/USD forex pair and GBP/USD
     pairs = ["EURUSD", "GBPUSD"]
 
     # create the OANDA market price streaming object and provide authentication information
-    price_stream = StreamingForexPrices(STREAM_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID, pairs, events)
+    price_stream = AsyncStreamingForexPrices(
+        STREAM_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID, pairs, events, capture_file=STREAM_CAPTURE_FILE,
+        max_pending=MAX_PENDING_TICKS
+    )
 
     # create the execution handler instance
-    execution_handler = Execution(API_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID)
+    execution_handler = AsyncExecution(API_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID, events)
 
     portfolio = Portfolio(price_stream, events, equity=Decimal("100113.20"), backtest=False)
 
@@ -63,10 +87,25 @@ if __name__ == "__main__":
     # strategy = MovingAverageCrossStrategy(pairs, events, 40, 200)
     strategy = TestStrategy(pairs, events)
 
-    # create two separate threads, one for the infinite trading event loop and another for the price streaming
-    trade_thread = threading.Thread(target=trade, args=(events, strategy, portfolio, execution_handler))
+    # create two separate threads, one for the trading event loop and another for the price streaming
+    latency = None
+    if LATENCY_INSTRUMENTATION:
+        latency = LatencyRecorder(LATENCY_REPORT_INTERVAL)
+        price_stream.stamp_ticks = True
+    event_loop = create_event_loop(events, strategy, portfolio, execution_handler, latency)
+    trade_thread = threading.Thread(target=event_loop.run)
     price_stream_thread = threading.Thread(target=price_stream.stream_to_queue, args=[])
+    price_stream_thread.daemon = True
 
-    # initiate both threads
+    # initiate both threads and stop the event loop cleanly on Ctrl-C
     trade_thread.start()
     price_stream_thread.start()
+    try:
+        trade_thread.join()
+    except KeyboardInterrupt:
+        price_stream.stop()
+        event_loop.stop()
+        trade_thread.join()
+        execution_handler.close()
+        # Handle the fills of the orders submitted on closing
+        event_loop.drain()
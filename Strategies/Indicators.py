@@ -0,0 +1,285 @@
+# Rolling indicators for strategies. Every indicator is updated one
+# value at a time in O(1), keeping its window in a preallocated numpy
+# ring buffer (or a monotonic deque for the rolling minimum and
+# maximum), and is NaN until its window is full, except for the EMA,
+# which has no window and is seeded with the first value. Each one has a
+# matching vectorised *_batch function over a whole array of values,
+# for backtests and parameter screening, which gives the same results
+# as updating the indicator value by value.
+# A strategy keeps one indicator per pair, e.g.
+#     self.sma = {p: SMA(40) for p in pairs}
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+NAN = float("nan")
+
+
+class RingBuffer(object):
+    """
+    A fixed-size window of the last "size" values.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = np.zeros(size)
+        self.count = 0
+
+    @property
+    def full(self):
+        return self.count >= self.size
+
+    def push(self, value):
+        """
+        Adds a value and returns the value that has left the window
+        (0.0 while the window is filling up).
+        """
+        i = self.count % self.size
+        old = self.values[i]
+        self.values[i] = value
+        self.count += 1
+        return old
+
+    def window(self):
+        """
+        Returns the values in the window, oldest first.
+        """
+        if self.count <= self.size:
+            return self.values[:self.count].copy()
+        i = self.count % self.size
+        return np.concatenate((self.values[i:], self.values[:i]))
+
+
+class SMA(object):
+    """
+    The simple moving average of the last window values. The running
+    sum is recomputed from the buffer each time the buffer wraps
+    around, so rounding errors do not accumulate.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = RingBuffer(window)
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, value):
+        value = float(value)
+        self.total += value - self.buffer.push(value)
+        if self.buffer.count % self.window == 0:
+            self.total = float(self.buffer.values.sum())
+        if self.buffer.full:
+            self.value = self.total / self.window
+        return self.value
+
+
+def sma_batch(values, window):
+    return pd.Series(values, dtype=float).rolling(window).mean().values
+
+
+class EMA(object):
+    """
+    The exponential moving average with smoothing factor
+    alpha = 2 / (window + 1), seeded with the first value.
+    """
+
+    def __init__(self, window=None, alpha=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (window + 1)
+        self.value = NAN
+
+    def update(self, value):
+        value = float(value)
+        if self.value != self.value:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+def ema_batch(values, window=None, alpha=None):
+    """
+    Returns the array of EMA values, with alpha = 2 / (window + 1)
+    unless alpha is given. As in EMA the first value is the seed, so
+    no value is NaN.
+    """
+    alpha = alpha if alpha is not None else 2.0 / (window + 1)
+    return pd.Series(values, dtype=float).ewm(alpha=alpha, adjust=False).mean().values
+
+
+class RollingStd(object):
+    """
+    The rolling mean, standard deviation (with ddof degrees of
+    freedom) and z-score of the last window values. The running sums
+    are of the values less the first value, which keeps them small
+    for prices and so avoids cancellation in the variance.
+    """
+
+    def __init__(self, window, ddof=1):
+        self.window = window
+        self.ddof = ddof
+        self.buffer = RingBuffer(window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.shift = None
+        self.mean = NAN
+        self.value = NAN
+        self.zscore = NAN
+
+    def update(self, value):
+        value = float(value)
+        if self.shift is None:
+            self.shift = value
+        x = value - self.shift
+        old = self.buffer.push(x)
+        self.total += x - old
+        self.total_sq += x * x - old * old
+        if self.buffer.count % self.window == 0:
+            self.total = float(self.buffer.values.sum())
+            self.total_sq = float(np.dot(self.buffer.values, self.buffer.values))
+        if self.buffer.full:
+            n = self.window
+            mean = self.total / n
+            variance = max(self.total_sq - self.total * mean, 0.0) / (n - self.ddof)
+            self.mean = mean + self.shift
+            self.value = variance ** 0.5
+            self.zscore = (x - mean) / self.value if self.value else 0.0
+        return self.value
+
+
+def rolling_std_batch(values, window, ddof=1):
+    """
+    Returns the arrays of the rolling mean, standard deviation and
+    z-score. As in RollingStd the first value is subtracted first.
+    """
+    series = pd.Series(values, dtype=float)
+    shift = series.iloc[0] if len(series) else 0.0
+    series = series - shift
+    rolling = series.rolling(window)
+    mean = rolling.mean()
+    std = rolling.std(ddof=ddof)
+    zscore = ((series - mean) / std).where(std != 0, 0.0).where(std.notna())
+    return mean.values + shift, std.values, zscore.values
+
+
+class ATR(object):
+    """
+    The average true range of bars, with Wilder's smoothing seeded
+    by the mean true range of the first window bars.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.close = None
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, high, low, close):
+        high, low, close = float(high), float(low), float(close)
+        if self.close is None:
+            true_range = high - low
+        else:
+            true_range = max(high, self.close) - min(low, self.close)
+        self.close = close
+        self.count += 1
+        if self.count < self.window:
+            self.total += true_range
+        elif self.count == self.window:
+            self.value = (self.total + true_range) / self.window
+        else:
+            self.value += (true_range - self.value) / self.window
+        return self.value
+
+
+def atr_batch(high, low, close, window):
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    prev_close = np.concatenate(([NAN], close[:-1]))
+    true_range = np.fmax(high, prev_close) - np.fmin(low, prev_close)
+    atr = np.full(len(true_range), NAN)
+    if len(true_range) >= window:
+        seeded = true_range[window - 1:].copy()
+        seeded[0] = true_range[:window].mean()
+        atr[window - 1:] = pd.Series(seeded).ewm(alpha=1.0 / window, adjust=False).mean().values
+    return atr
+
+
+class Bollinger(object):
+    """
+    Bollinger bands: the simple moving average of the last window
+    values and bands k population standard deviations either side.
+    """
+
+    def __init__(self, window, k=2.0):
+        self.k = k
+        self.std = RollingStd(window, ddof=0)
+        self.middle = NAN
+        self.upper = NAN
+        self.lower = NAN
+
+    def update(self, value):
+        std = self.std.update(value)
+        self.middle = self.std.mean
+        self.upper = self.middle + self.k * std
+        self.lower = self.middle - self.k * std
+        return self.middle, self.upper, self.lower
+
+
+def bollinger_batch(values, window, k=2.0):
+    """
+    Returns the arrays of the middle, upper and lower bands.
+    """
+    middle, std, _ = rolling_std_batch(values, window, ddof=0)
+    return middle, middle + k * std, middle - k * std
+
+
+class RollingExtreme(object):
+    """
+    The rolling maximum (or minimum) of the last window values,
+    kept in a monotonic deque of (index, value) candidates so that
+    each update is amortised O(1).
+    """
+
+    def __init__(self, window, maximum=True):
+        self.window = window
+        self.maximum = maximum
+        self.candidates = deque()
+        self.count = 0
+        self.value = NAN
+
+    def update(self, value):
+        value = float(value)
+        candidates = self.candidates
+        if self.maximum:
+            while candidates and candidates[-1][1] <= value:
+                candidates.pop()
+        else:
+            while candidates and candidates[-1][1] >= value:
+                candidates.pop()
+        candidates.append((self.count, value))
+        if candidates[0][0] <= self.count - self.window:
+            candidates.popleft()
+        self.count += 1
+        if self.count >= self.window:
+            self.value = candidates[0][1]
+        return self.value
+
+
+class RollingMax(RollingExtreme):
+    def __init__(self, window):
+        super(RollingMax, self).__init__(window, maximum=True)
+
+
+class RollingMin(RollingExtreme):
+    def __init__(self, window):
+        super(RollingMin, self).__init__(window, maximum=False)
+
+
+def rolling_max_batch(values, window):
+    return pd.Series(values, dtype=float).rolling(window).max().values
+
+
+def rolling_min_batch(values, window):
+    return pd.Series(values, dtype=float).rolling(window).min().values
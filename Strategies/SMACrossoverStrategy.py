@@ -1,5 +1,10 @@
 import copy
+
+import numpy as np
+
+from Events.Event import EventType
 from Events.SignalEvent import SignalEvent
+from Strategies.Indicators import ema_batch
 
 
 class MovingAverageCrossStrategy(object):
@@ -15,17 +20,26 @@ class MovingAverageCrossStrategy(object):
     The strategy uses a rolling SMA calculation in order to
     increase efficiency by eliminating the need to call two
     full moving average calculations on each tick.
+    calculate_signals_batch evaluates the same strategy over a
+    whole array of prices at once, which is useful for quickly
+    screening parameters before validating them in the event loop.
+    When a timeframe (in seconds) is given the windows count bars
+    of that timeframe instead of ticks, and the strategy handles the
+    BAR events of a Price.BarAggregator, using the closing bid.
     """
 
     def __init__(
             self, pairs, events,
-            short_window=40, long_window=200
+            short_window=40, long_window=200, timeframe=None
     ):
         self.pairs = pairs
         self.pairs_dict = self.create_pairs_dict()
         self.events = events
         self.short_window = short_window
         self.long_window = long_window
+        self.timeframe = timeframe
+        self.timeframes = (timeframe,) if timeframe else ()
+        self.event_type = EventType.BAR if timeframe else EventType.TICK
 
     def create_pairs_dict(self):
         attr_dict = {
@@ -43,8 +57,88 @@ class MovingAverageCrossStrategy(object):
     def calc_rolling_sma(sma_m_1, window, price):
         return ((sma_m_1 * (window - 1)) + price) / window
 
+    @staticmethod
+    def calc_rolling_sma_batch(prices, window):
+        """
+        Evaluates the calc_rolling_sma recurrence over a whole array
+        of prices, seeded with the first price, and returns the array
+        of float64 SMA values.
+        The recurrence is an exponential moving average with smoothing
+        factor 1 / window, which ema_batch evaluates in compiled code.
+        The values are within about window * 1e-16 of the per-tick
+        ones, relative to the prices, so calculate_signals_batch only
+        uses them where the two SMAs are further apart than that.
+        """
+        return ema_batch(np.asarray(prices, dtype=np.float64), alpha=1.0 / window)
+
+    def calc_exact_crossover(self, prices, indices):
+        """
+        Returns the arrays of whether the short SMA is above and
+        below the long SMA at the given (sorted) tick indices, with
+        calc_rolling_sma applied per tick to the prices themselves,
+        exactly as in calculate_signals.
+        """
+        prices = np.asarray(prices, dtype=object)
+        above = np.zeros(len(indices), dtype=bool)
+        below = np.zeros(len(indices), dtype=bool)
+        short_sma = long_sma = prices[0]
+        j = 0
+        for i in range(indices[-1] + 1):
+            if i > 0:
+                short_sma = self.calc_rolling_sma(short_sma, self.short_window, prices[i])
+                long_sma = self.calc_rolling_sma(long_sma, self.long_window, prices[i])
+            if i == indices[j]:
+                above[j] = short_sma > long_sma
+                below[j] = short_sma < long_sma
+                j += 1
+        return above, below
+
+    def calculate_signals_batch(self, prices):
+        """
+        Computes the buy/sell signals that calculate_signals would
+        emit for a single pair whose bid prices, in tick order, are
+        given by prices. Returns a tuple of (tick_indices, sides)
+        where sides is an array of "buy"/"sell" strings.
+        The invested flag is derived from the crossover state: it is
+        set when the short SMA is above the long SMA, cleared when
+        it is below and carried forward when they are equal.
+        Where the float64 SMAs are too close to decide the crossover
+        (such as when they are equal), it is decided by the per-tick
+        recurrence over the prices instead, so that the signals are
+        exactly those of calculate_signals.
+        """
+        values = np.asarray(prices, dtype=np.float64)
+        short_sma = self.calc_rolling_sma_batch(values, self.short_window)
+        long_sma = self.calc_rolling_sma_batch(values, self.long_window)
+        n = len(values)
+        above = short_sma > long_sma
+        below = short_sma < long_sma
+
+        # Only start the strategy when we have created an accurate short window
+        active = np.arange(n) > self.short_window
+
+        # A bound on the rounding error of the difference of the SMAs
+        if n:
+            tolerance = (
+                64 * np.finfo(np.float64).eps * np.max(np.abs(values)) *
+                (self.short_window + self.long_window)
+            )
+            unsure = np.flatnonzero(active & (np.abs(short_sma - long_sma) <= tolerance))
+            if len(unsure):
+                above[unsure], below[unsure] = self.calc_exact_crossover(prices, unsure)
+        decided = active & (above | below)
+
+        # Forward fill the last decided state, starting uninvested
+        last = np.maximum.accumulate(np.where(decided, np.arange(n), -1))
+        invested = np.where(last >= 0, above[np.maximum(last, 0)], False)
+
+        prev = np.concatenate(([False], invested[:-1]))
+        changes = np.flatnonzero(invested != prev)
+        sides = np.where(invested[changes], "buy", "sell")
+        return changes, sides
+
     def calculate_signals(self, event):
-        if event.type == 'TICK':
+        if event.type == self.event_type and (self.timeframe is None or event.timeframe == self.timeframe):
             pair = event.instrument
             price = event.bid
             pd = self.pairs_dict[pair]
@@ -61,11 +155,11 @@ class MovingAverageCrossStrategy(object):
             # Only start the strategy when we have created an accurate short window
             if pd["ticks"] > self.short_window:
                 if pd["short_sma"] > pd["long_sma"] and not pd["invested"]:
-                    signal = SignalEvent(pair, "market", "buy")
+                    signal = SignalEvent(pair, "market", "buy", event.origin_ns)
                     self.events.put(signal)
                     pd["invested"] = True
                 if pd["short_sma"] < pd["long_sma"] and pd["invested"]:
-                    signal = SignalEvent(pair, "market", "sell")
+                    signal = SignalEvent(pair, "market", "sell", event.origin_ns)
                     self.events.put(signal)
                     pd["invested"] = False
             pd["ticks"] += 1
@@ -26,11 +26,11 @@ class TestStrategy(object):
             pd = self.pairs_dict[event.instrument]
             if pd["ticks"] % 10 == 0:
                 if not pd["invested"]:
-                    signal = SignalEvent(event.instrument, "market", "buy")
+                    signal = SignalEvent(event.instrument, "market", "buy", event.origin_ns)
                     self.events.put(signal)
                     pd["invested"] = True
                 else:
-                    signal = SignalEvent(event.instrument, "market", "sell")
+                    signal = SignalEvent(event.instrument, "market", "sell", event.origin_ns)
                     self.events.put(signal)
                     pd["invested"] = False
             pd["ticks"] += 1
@@ -18,3 +18,13 @@ ACCESS_TOKEN = 'bbb867acab7bb8c83340d23a7c1effc3-ce526dce9bb945ad70cd107019806aa
 ACCOUNT_ID = '101-004-8844789-001'
 CSV_DATA_DIR = './Data'
 OUTPUT_RESULTS_DIR = './Output'
+TICK_CACHE_DIR = './Data/cache'
+# Set to a path (e.g. './Data/stream.log.gz') to record the live price stream
+STREAM_CAPTURE_FILE = None
+# The most live ticks waiting on the events queue before the price stream waits
+MAX_PENDING_TICKS = 10000
+# Stamp live ticks and record tick-to-order latencies (see Metrics.Latency)
+LATENCY_INSTRUMENTATION = False
+LATENCY_REPORT_INTERVAL = 60.0
+# Where Backtest.SignalCache keeps the signals of strategies
+SIGNAL_CACHE_DIR = './Data/signals'
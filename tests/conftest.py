@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# The packages of the repository are imported from its root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import settings  # noqa: E402
+from Scripts.get_pair import generate_month  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def tick_cache_dir(tmp_path, monkeypatch):
+    """
+    Keeps the tick cache of every test in its own directory.
+    """
+    cache_dir = str(tmp_path / "cache")
+    monkeypatch.setattr(settings, "TICK_CACHE_DIR", cache_dir)
+    return cache_dir
+
+
+@pytest.fixture(scope="session")
+def month_dir(tmp_path_factory):
+    """
+    A generated month of ticks, about one a minute, for GBPUSD and
+    EURUSD.
+    """
+    csv_dir = str(tmp_path_factory.mktemp("ticks"))
+    generate_month(
+        ["GBPUSD", "EURUSD"], 2014, 1, seed=7, correlation=0.5,
+        output_dir=csv_dir, mu_dt=60000, sigma_dt=5000
+    )
+    return csv_dir
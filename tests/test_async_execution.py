@@ -0,0 +1,191 @@
+import json
+import queue
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from Events.OrderEvent import OrderEvent
+from Execution.AsyncExecutionHandler import AsyncExecution
+
+
+class MockOrders(object):
+    """
+    The state of a local mock of the OANDA order create endpoint:
+    the orders received, the most submitted at once, and a function
+    of each order returning the response status and body.
+    """
+
+    def __init__(self, respond, delay=0.0):
+        self.respond = respond
+        self.delay = delay
+        self.orders = []
+        self.paths = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+
+def filled(order):
+    return 201, {"orderFillTransaction": {
+        "id": "2", "orderID": "1", "units": order["units"], "price": "1.10010"
+    }}
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(respond=filled, delay=0.0):
+        mock = MockOrders(respond, delay)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with mock.lock:
+                    mock.orders.append(body["order"])
+                    mock.paths.append(self.path)
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                time.sleep(mock.delay)
+                status, rv = mock.respond(body["order"])
+                data = rv if isinstance(rv, bytes) else json.dumps(rv).encode("utf-8")
+                with mock.lock:
+                    mock.in_flight -= 1
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return mock, "http://127.0.0.1:%d" % server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def create_execution(base_url, events, **kwargs):
+    return AsyncExecution(None, "token", "account", events, base_url=base_url, **kwargs)
+
+
+def fills(events):
+    result = []
+    while not events.empty():
+        result.append(events.get())
+    return sorted(result, key=lambda f: f.instrument)
+
+
+def test_orders_are_submitted_by_the_thread_pool(mock_server):
+    mock, base_url = mock_server(delay=0.3)
+    events = queue.Queue()
+    execution = create_execution(base_url, events, max_workers=4, coalesce_window=0)
+
+    start = time.monotonic()
+    for instrument in ("EUR_USD", "GBP_USD", "AUD_USD", "USD_JPY"):
+        execution.execute_order(OrderEvent(instrument, 1000, "market", "buy"))
+    # Submitting does not wait for the responses
+    assert time.monotonic() - start < 0.2
+    execution.close()
+
+    assert mock.max_in_flight > 1
+    assert mock.paths == ["/v3/accounts/account/orders"] * 4
+    result = fills(events)
+    assert [f.instrument for f in result] == ["AUD_USD", "EUR_USD", "GBP_USD", "USD_JPY"]
+    assert all(f.status == "FILLED" and f.price == Decimal("1.10010") for f in result)
+
+
+def test_orders_within_the_window_are_coalesced(mock_server):
+    mock, base_url = mock_server()
+    events = queue.Queue()
+    execution = create_execution(base_url, events, coalesce_window=0.2)
+
+    execution.execute_order(OrderEvent("EUR_USD", 100, "market", "buy"))
+    execution.execute_order(OrderEvent("EUR_USD", 100, "market", "buy"))
+    execution.execute_order(OrderEvent("EUR_USD", 30, "market", "sell"))
+    execution.execute_order(OrderEvent("GBP_USD", 50, "market", "buy"))
+    execution.execute_order(OrderEvent("GBP_USD", 50, "market", "sell"))
+    time.sleep(0.5)
+    execution.close()
+
+    # GBP_USD nets to nothing, so is not submitted
+    assert [(o["instrument"], o["units"]) for o in mock.orders] == [("EUR_USD", "170")]
+    result = fills(events)
+    assert [(f.instrument, f.units, f.side, f.status) for f in result] == [
+        ("EUR_USD", 170, "buy", "FILLED")
+    ]
+
+
+def test_close_flushes_orders_still_in_their_window(mock_server):
+    mock, base_url = mock_server()
+    events = queue.Queue()
+    execution = create_execution(base_url, events, coalesce_window=10.0)
+
+    execution.execute_order(OrderEvent("EUR_USD", 100, "market", "sell"))
+    execution.close()
+
+    assert [(o["instrument"], o["units"]) for o in mock.orders] == [("EUR_USD", "-100")]
+    assert [(f.side, f.status) for f in fills(events)] == [("sell", "FILLED")]
+
+
+def test_error_responses_become_rejected_or_error_fills(mock_server):
+    def respond(order):
+        if order["instrument"] == "EUR_USD":
+            return 201, {"orderCancelTransaction": {"orderID": "7", "reason": "MARKET_HALTED"}}
+        if order["instrument"] == "GBP_USD":
+            return 400, {"orderRejectTransaction": {"reason": "INSUFFICIENT_MARGIN"}}
+        if order["instrument"] == "AUD_USD":
+            return 401, {"errorMessage": "Insufficient authorization"}
+        return 502, b"<html>Bad gateway</html>"
+
+    mock, base_url = mock_server(respond)
+    events = queue.Queue()
+    execution = create_execution(base_url, events, coalesce_window=0)
+    for instrument in ("EUR_USD", "GBP_USD", "AUD_USD", "USD_JPY"):
+        execution.execute_order(OrderEvent(instrument, 1000, "market", "buy"))
+    execution.close()
+
+    result = [(f.instrument, f.status, f.order_id, f.message) for f in fills(events)]
+    assert result[:3] == [
+        ("AUD_USD", "REJECTED", None, "Insufficient authorization"),
+        ("EUR_USD", "REJECTED", "7", "MARKET_HALTED"),
+        ("GBP_USD", "REJECTED", None, "INSUFFICIENT_MARGIN"),
+    ]
+    # A body that is not JSON is reported as an error
+    assert result[3][:2] == ("USD_JPY", "ERROR")
+
+
+def test_unreadable_fills_become_error_fills(mock_server):
+    def respond(order):
+        # A fill transaction without a price
+        return 201, {"orderFillTransaction": {"id": "2", "units": order["units"]}}
+
+    mock, base_url = mock_server(respond)
+    events = queue.Queue()
+    execution = create_execution(base_url, events, coalesce_window=0)
+    execution.execute_order(OrderEvent("EUR_USD", 1000, "market", "sell"))
+    execution.close()
+
+    result = fills(events)
+    assert [(f.instrument, f.units, f.side, f.status) for f in result] == [("EUR_USD", 1000, "sell", "ERROR")]
+    assert "price" in result[0].message
+
+
+def test_connection_failures_become_error_fills():
+    events = queue.Queue()
+    # Nothing listens on the discard port
+    execution = create_execution("http://127.0.0.1:9", events, coalesce_window=0, timeout=2.0)
+    execution.execute_order(OrderEvent("EUR_USD", 1000, "market", "buy"))
+    execution.close()
+
+    result = fills(events)
+    assert [(f.instrument, f.units, f.side, f.status) for f in result] == [("EUR_USD", 1000, "buy", "ERROR")]
+    assert result[0].message
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import queue
+import time
+from decimal import Decimal
+
+from Price import StreamRecorder
+from Price.AsyncStreamingPriceHandler import AsyncStreamingForexPrices
+
+HEARTBEAT = b'{"type":"HEARTBEAT","time":"2017-01-01T00:00:00.000000000Z"}\n'
+
+
+def price_line(instrument, bid, ask, time_stamp="2017-01-01T00:00:01.000000000Z"):
+    return (json.dumps({
+        "type": "PRICE", "instrument": instrument, "time": time_stamp,
+        "bids": [{"price": bid, "liquidity": 1000000}],
+        "asks": [{"price": ask, "liquidity": 1000000}]
+    }) + "\n").encode("ascii")
+
+
+class FakeStreamServer(object):
+    """
+    A local HTTP server standing in for the OANDA stream endpoint.
+    Each connection is answered by the next of the given handlers,
+    coroutines called with the request writer, and the time of
+    every connection is recorded.
+    """
+
+    def __init__(self, handlers):
+        self.handlers = list(handlers)
+        self.connected = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.connected.append(time.monotonic())
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        handler = self.handlers.pop(0) if self.handlers else stall
+        try:
+            await handler(writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def chunked(*chunks):
+    """
+    A handler that sends a chunked 200 response of the given chunks
+    and then keeps the connection open without sending anything.
+    """
+    async def handler(writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        for chunk in chunks:
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain()
+            await asyncio.sleep(0.01)
+        await stall(writer)
+    return handler
+
+
+async def unavailable(writer):
+    body = b'{"errorMessage":"Service unavailable"}'
+    writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+    await writer.drain()
+
+
+async def truncated(writer):
+    writer.write(b"HTTP/1.1\r\n\r\n")
+    await writer.drain()
+
+
+async def stall(writer):
+    await asyncio.sleep(60)
+
+
+def run_stream(handlers, wait_for_ticks, timeout=10.0, handler_class=AsyncStreamingForexPrices, **kwargs):
+    """
+    Streams from a FakeStreamServer until wait_for_ticks TickEvents
+    have arrived, and returns the price handler, the TickEvents and
+    the server.
+    """
+    events = queue.Queue()
+
+    async def main():
+        server = FakeStreamServer(handlers)
+        await server.start()
+        prices = handler_class(
+            "127.0.0.1", "token", "account", ["GBPUSD", "EURUSD"], events,
+            port=server.port, use_ssl=False, **kwargs
+        )
+        task = asyncio.ensure_future(prices.stream())
+        deadline = time.monotonic() + timeout
+        while events.qsize() < wait_for_ticks and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        prices.stop()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await server.close()
+        return prices, server
+
+    prices, server = asyncio.run(main())
+    ticks = []
+    while not events.empty():
+        ticks.append(events.get())
+    return prices, ticks, server
+
+
+def test_chunked_ticks_are_decoded():
+    body = HEARTBEAT + price_line("GBP_USD", "1.50010", "1.50030") + price_line("EUR_USD", "1.10010", "1.10030")
+    # Split the lines across chunks, mid-line
+    handlers = [chunked(body[:50], body[50:130], body[130:])]
+    prices, ticks, server = run_stream(handlers, 2)
+
+    assert [(t.instrument, t.bid, t.ask) for t in ticks] == [
+        ("GBPUSD", Decimal("1.50010"), Decimal("1.50030")),
+        ("EURUSD", Decimal("1.10010"), Decimal("1.10030")),
+    ]
+    assert prices.prices["GBPUSD"]["ask"] == Decimal("1.50030")
+    assert len(server.connected) == 1
+
+
+def test_error_status_reconnects_after_backoff():
+    handlers = [unavailable, unavailable, chunked(HEARTBEAT + price_line("GBP_USD", "1.50010", "1.50030"))]
+    prices, ticks, server = run_stream(handlers, 1, initial_backoff=0.2, max_backoff=1.0)
+
+    assert len(ticks) == 1
+    assert len(server.connected) == 3
+    gaps = [b - a for a, b in zip(server.connected, server.connected[1:])]
+    # The backoff doubles after each failed connection
+    assert gaps[0] >= 0.2
+    assert gaps[1] >= 0.4
+    assert prices.reconnects >= 2
+
+
+def test_malformed_status_line_is_reconnected():
+    handlers = [truncated, chunked(HEARTBEAT + price_line("GBP_USD", "1.50010", "1.50030"))]
+    prices, ticks, server = run_stream(handlers, 1, initial_backoff=0.05)
+
+    assert len(ticks) == 1
+    assert len(server.connected) == 2
+    assert prices.reconnects >= 1
+
+
+def test_stalled_stream_is_reconnected_by_the_watchdog():
+    handlers = [
+        chunked(HEARTBEAT),
+        chunked(HEARTBEAT + price_line("GBP_USD", "1.50010", "1.50030")),
+    ]
+    prices, ticks, server = run_stream(handlers, 1, heartbeat_timeout=0.4, initial_backoff=0.05)
+
+    assert len(ticks) == 1
+    assert len(server.connected) == 2
+    # The first connection was aborted once the heartbeats stopped
+    assert server.connected[1] - server.connected[0] >= 0.4
+
+
+def test_malformed_lines_are_skipped():
+    body = (
+        HEARTBEAT + price_line("GBP_USD", "1.50010", "1.50030") +
+        b'{"type":"PRICE","instrument":\n' +
+        price_line("EUR_USD", "1.10010", "1.10030")
+    )
+    prices, ticks, server = run_stream([chunked(body)], 2)
+
+    assert [t.instrument for t in ticks] == ["GBPUSD", "EURUSD"]
+    assert prices.prices["EURUSD"]["bid"] == Decimal("1.10010")
+
+
+class SlowPrices(AsyncStreamingForexPrices):
+    """
+    Waits 200ms to place each tick, as when the events queue is full.
+    """
+
+    async def _put_event(self, event):
+        await asyncio.sleep(0.2)
+        await super(SlowPrices, self)._put_event(event)
+
+
+def test_capture_is_stamped_on_receipt(tmp_path):
+    capture_file = str(tmp_path / "capture.gz")
+    chunks = [price_line("GBP_USD", "1.5001%d" % i, "1.5003%d" % i) for i in range(3)]
+    prices, ticks, server = run_stream(
+        [chunked(*chunks)], 3, handler_class=SlowPrices, capture_file=capture_file
+    )
+
+    batches = list(StreamRecorder.read_capture(capture_file))
+    assert len(ticks) == 3
+    assert len(batches) == 3
+    # The chunks arrived about 10ms apart, though each waited 200ms to be placed
+    stamps = [received_ns for received_ns, _ in batches]
+    assert stamps[-1] - stamps[0] < 150000000
+
+
+def test_unreadable_price_messages_are_skipped():
+    body = (
+        HEARTBEAT +
+        b'{"type":"PRICE","instrument":"GBP_USD","time":"2017-01-01T00:00:01.000000000Z",'
+        b'"bids":[],"asks":[{"price":"1.50030","liquidity":1000000}]}\n' +
+        price_line("USD_JPY", "110.010", "110.030") +
+        b'5\n' +
+        price_line("EUR_USD", "1.10010", "1.10030")
+    )
+    prices, ticks, server = run_stream([chunked(body)], 1)
+
+    assert [t.instrument for t in ticks] == ["EURUSD"]
+    assert prices.prices["GBPUSD"]["bid"] is None
+
+
+class FailingPrices(AsyncStreamingForexPrices):
+    """
+    Fails to decode the first batch of lines.
+    """
+
+    failed = False
+
+    def on_lines(self, lines, received_ns=None):
+        if not self.failed:
+            self.failed = True
+            raise RuntimeError("Decoding failed")
+        return super(FailingPrices, self).on_lines(lines, received_ns)
+
+
+def test_failed_consumer_is_restarted():
+    chunks = [price_line("GBP_USD", "1.5001%d" % i, "1.5003%d" % i) for i in range(3)]
+    prices, ticks, server = run_stream([chunked(*chunks)], 2, handler_class=FailingPrices)
+
+    assert prices.failed
+    assert [t.bid for t in ticks] == [Decimal("1.50011"), Decimal("1.50012")]
+    assert len(server.connected) == 1
+
+
+def test_ticks_wait_while_the_events_queue_is_behind():
+    chunks = [price_line("GBP_USD", "1.5001%d" % i, "1.5003%d" % i) for i in range(5)]
+    # The events queue is never read, so only max_pending ticks are placed
+    prices, ticks, server = run_stream([chunked(*chunks)], 5, timeout=1.0, max_pending=2)
+
+    assert [t.bid for t in ticks] == [Decimal("1.50010"), Decimal("1.50011")]
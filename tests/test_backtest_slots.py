@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from Backtest.Backtest import Backtest
+from Backtest.SignalCache import SignalCache
+from Events.Event import EventType
+from Events.EventLoop import SHUTDOWN
+from Execution.ExecutionHandler import SimulatedExecution
+from Execution.SimulatedBroker import SimulatedBroker
+from Portfolio.Portfolio import Portfolio
+from Price.HistoricPriceHandler import HistoricCSVPriceHandler
+from Strategies.SMACrossoverStrategy import MovingAverageCrossStrategy
+
+PAIRS = ["GBPUSD", "EURUSD"]
+
+
+class CountingStrategy(object):
+    """
+    Counts the ticks it handles, and stops its event loop once it
+    has handled stop_after of them.
+    """
+
+    def __init__(self, pairs, events, stop_after=None):
+        self.events = events
+        self.stop_after = stop_after
+        self.ticks = 0
+
+    def calculate_signals(self, event):
+        if event.type == EventType.TICK:
+            self.ticks += 1
+            if self.ticks == self.stop_after:
+                self.events.put(SHUTDOWN)
+
+
+def run_slots(csv_dir, output_dir, stop_after, signal_cache=None):
+    backtest = Backtest(
+        PAIRS, HistoricCSVPriceHandler, None, None, None, SimulatedExecution,
+        equity=Decimal("100000.00"), csv_dir=csv_dir, output_dir=output_dir,
+        signal_cache=signal_cache, slots=[
+            (CountingStrategy, {"stop_after": stop_after}, Portfolio),
+            (CountingStrategy, {}, Portfolio),
+        ]
+    )
+    backtest.simulate_trading()
+    return backtest
+
+
+def test_stopped_slot_is_retired(month_dir, tmp_path):
+    backtest = run_slots(month_dir, str(tmp_path / "output"), 50)
+    stopped, running = backtest.slots
+
+    assert stopped.retired and not running.retired
+    assert stopped.strategy.ticks == 50
+    assert running.strategy.ticks > 1000
+    # The retired slot's queue no longer receives ticks
+    assert backtest.fanout.queues == [running.events]
+    assert stopped.events.empty()
+
+
+def test_retired_slot_signals_are_not_cached(month_dir, tmp_path):
+    signal_cache = SignalCache(str(tmp_path / "signals"))
+    backtest = run_slots(month_dir, str(tmp_path / "output"), 50, signal_cache)
+    stopped, running = backtest.slots
+
+    assert signal_cache.get(stopped.cache_key) is None
+    assert signal_cache.get(running.cache_key) is not None
+
+
+def test_fills_do_not_update_the_metrics(month_dir, tmp_path):
+    backtest = Backtest(
+        PAIRS, HistoricCSVPriceHandler, MovingAverageCrossStrategy,
+        {"short_window": 10, "long_window": 60}, Portfolio, SimulatedBroker,
+        equity=Decimal("100000.00"), csv_dir=month_dir, output_dir=str(tmp_path)
+    )
+    counts = {EventType.TICK: 0, EventType.SIGNAL: 0, EventType.FILL: 0}
+    handlers = backtest.event_loop.handlers
+
+    def count(event):
+        counts[event.type] += 1
+
+    for event_type in counts:
+        handlers[event_type] = (count,) + handlers[event_type]
+    backtest.simulate_trading()
+
+    assert counts[EventType.FILL] > 10
+    # The metrics are updated once for each tick and signal only
+    assert backtest.portfolio.metrics.periods + 1 == counts[EventType.TICK] + counts[EventType.SIGNAL]
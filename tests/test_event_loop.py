@@ -0,0 +1,49 @@
+import queue
+import threading
+
+from Events.Event import EventType
+from Events.EventLoop import EventLoop
+from Events.OrderEvent import OrderEvent
+from Events.SignalEvent import SignalEvent
+from Events.TickEvent import TickEvent
+
+
+def create_loop(events, orders):
+    """
+    A loop whose ticks each lead to a signal and then an order.
+    """
+    return EventLoop(events, {
+        EventType.TICK: [lambda e: events.put(SignalEvent(e.instrument, "market", "buy"))],
+        EventType.SIGNAL: [lambda e: events.put(OrderEvent(e.instrument, 1, "market", "buy"))],
+        EventType.ORDER: [orders.append]
+    })
+
+
+def test_stop_handles_the_events_derived_from_the_last_ticks():
+    for _ in range(20):
+        events = queue.Queue()
+        orders = []
+        loop = create_loop(events, orders)
+        thread = threading.Thread(target=loop.run)
+        thread.start()
+        for _ in range(300):
+            events.put(TickEvent("GBPUSD", None, 1, 1))
+        loop.stop()
+        thread.join(10)
+
+        assert not thread.is_alive()
+        assert len(orders) == 300
+        assert loop.dispatched == 900
+
+
+def test_drain_stops_at_the_sentinel_once_the_queue_is_empty():
+    events = queue.Queue()
+    orders = []
+    loop = create_loop(events, orders)
+    events.put(TickEvent("GBPUSD", None, 1, 1))
+    loop.stop()
+    events.put(TickEvent("EURUSD", None, 1, 1))
+
+    assert loop.drain() is None
+    assert [o.instrument for o in orders] == ["GBPUSD", "EURUSD"]
+    assert events.empty()
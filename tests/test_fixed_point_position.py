@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from Backtest.Backtest import Backtest
+from Execution.ExecutionHandler import SimulatedExecution
+from Portfolio.FixedPointPosition import FixedPointPosition
+from Portfolio.Portfolio import Portfolio
+from Price.HistoricPriceHandler import HistoricCSVPriceHandler
+from Strategies.SMACrossoverStrategy import MovingAverageCrossStrategy
+
+PAIRS = ["GBPUSD", "EURUSD"]
+
+
+def run_backtest(csv_dir, output_dir, fixed_point):
+    backtest = Backtest(
+        PAIRS, HistoricCSVPriceHandler, MovingAverageCrossStrategy,
+        {"short_window": 10, "long_window": 60}, Portfolio, SimulatedExecution,
+        equity=Decimal("100000.00"), csv_dir=csv_dir, output_dir=output_dir,
+        portfolio_params={"fixed_point": fixed_point}
+    )
+    portfolio = backtest.portfolio
+    realised = []
+    record_trade = portfolio.metrics.record_trade
+
+    def record(pnl=None):
+        realised.append(pnl)
+        record_trade(pnl)
+
+    portfolio.metrics.record_trade = record
+    backtest.simulate_trading()
+    unrealised = {}
+    for pair, position in portfolio.positions.items():
+        position.update_position_price()
+        unrealised[pair] = position.profit_base
+    return portfolio, realised, unrealised
+
+
+def test_fixed_point_matches_decimal_over_a_month(month_dir, tmp_path):
+    decimal, decimal_realised, decimal_unrealised = run_backtest(
+        month_dir, str(tmp_path / "decimal"), fixed_point=False
+    )
+    fixed, fixed_realised, fixed_unrealised = run_backtest(
+        month_dir, str(tmp_path / "fixed"), fixed_point=True
+    )
+
+    assert fixed.position_class is FixedPointPosition
+    assert len([pnl for pnl in decimal_realised if pnl is not None]) > 10
+    assert fixed_realised == decimal_realised
+    assert fixed.balance == decimal.balance
+    assert fixed_unrealised == decimal_unrealised
+    assert sorted(fixed.positions) == sorted(decimal.positions)
+    for pair, position in decimal.positions.items():
+        assert fixed.positions[pair].units == position.units
+        assert fixed.positions[pair].average_price == position.average_price
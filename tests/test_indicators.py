@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+
+from Strategies import Indicators
+
+WINDOW = 14
+
+
+@pytest.fixture(scope="module")
+def prices():
+    rng = np.random.RandomState(5)
+    return 1.5 + np.cumsum(rng.normal(0.0, 0.0005, 500))
+
+
+@pytest.fixture(scope="module")
+def bars(prices):
+    rng = np.random.RandomState(6)
+    high = prices + rng.uniform(0.0, 0.001, len(prices))
+    low = prices - rng.uniform(0.0, 0.001, len(prices))
+    return high, low, prices
+
+
+def windows(values, window):
+    """
+    The window ending at each value, or None until it is full.
+    """
+    return [values[i + 1 - window:i + 1] if i + 1 >= window else None for i in range(len(values))]
+
+
+def reference_sma(values, window):
+    return np.array([np.nan if w is None else sum(w) / window for w in windows(values, window)])
+
+
+def reference_ema(values, alpha):
+    result = []
+    for value in values:
+        result.append(value if not result else result[-1] + alpha * (value - result[-1]))
+    return np.array(result)
+
+
+def reference_std(values, window, ddof):
+    means, stds, zscores = [], [], []
+    for value, w in zip(values, windows(values, window)):
+        if w is None:
+            means.append(np.nan)
+            stds.append(np.nan)
+            zscores.append(np.nan)
+            continue
+        mean = sum(w) / window
+        std = (sum((x - mean) ** 2 for x in w) / (window - ddof)) ** 0.5
+        means.append(mean)
+        stds.append(std)
+        zscores.append((value - mean) / std if std else 0.0)
+    return np.array(means), np.array(stds), np.array(zscores)
+
+
+def reference_atr(high, low, close, window):
+    true_ranges = [high[0] - low[0]] + [
+        max(high[i], close[i - 1]) - min(low[i], close[i - 1]) for i in range(1, len(close))
+    ]
+    result = [np.nan] * (window - 1)
+    result.append(sum(true_ranges[:window]) / window)
+    for true_range in true_ranges[window:]:
+        result.append((result[-1] * (window - 1) + true_range) / window)
+    return np.array(result)
+
+
+def incremental(indicator, values):
+    return np.array([indicator.update(value) for value in values])
+
+
+def test_sma_batch(prices):
+    expected = reference_sma(prices, WINDOW)
+
+    np.testing.assert_allclose(Indicators.sma_batch(prices, WINDOW), expected, rtol=1e-12)
+    np.testing.assert_allclose(incremental(Indicators.SMA(WINDOW), prices), expected, rtol=1e-12)
+
+
+def test_ema_batch_is_seeded_with_the_first_value(prices):
+    expected = reference_ema(prices, 2.0 / (WINDOW + 1))
+    result = Indicators.ema_batch(prices, WINDOW)
+
+    assert not np.isnan(result).any()
+    assert result[0] == prices[0]
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+    np.testing.assert_allclose(Indicators.ema_batch(prices, alpha=0.1), reference_ema(prices, 0.1), rtol=1e-12)
+    np.testing.assert_allclose(incremental(Indicators.EMA(WINDOW), prices), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("ddof", [0, 1])
+def test_rolling_std_batch(prices, ddof):
+    expected = reference_std(prices, WINDOW, ddof)
+    result = Indicators.rolling_std_batch(prices, WINDOW, ddof)
+    indicator = Indicators.RollingStd(WINDOW, ddof)
+    updates = []
+    for value in prices:
+        indicator.update(value)
+        updates.append((indicator.mean, indicator.value, indicator.zscore))
+
+    for actual, reference in zip(result, expected):
+        np.testing.assert_allclose(actual, reference, rtol=1e-7)
+    for actual, reference in zip(np.array(updates).T, expected):
+        np.testing.assert_allclose(actual, reference, rtol=1e-7)
+
+
+def test_rolling_std_of_constant_values_has_zero_zscore():
+    mean, std, zscore = Indicators.rolling_std_batch(np.full(20, 1.5), 5)
+
+    assert np.all(np.isnan(zscore[:4]))
+    np.testing.assert_allclose(mean[4:], 1.5)
+    np.testing.assert_allclose(std[4:], 0.0)
+    np.testing.assert_allclose(zscore[4:], 0.0)
+
+
+def test_atr_batch(bars):
+    high, low, close = bars
+    expected = reference_atr(high, low, close, WINDOW)
+    indicator = Indicators.ATR(WINDOW)
+
+    np.testing.assert_allclose(Indicators.atr_batch(high, low, close, WINDOW), expected, rtol=1e-10)
+    np.testing.assert_allclose(
+        [indicator.update(h, l, c) for h, l, c in zip(high, low, close)], expected, rtol=1e-10
+    )
+
+
+def test_atr_batch_shorter_than_the_window():
+    assert np.all(np.isnan(Indicators.atr_batch([1.2, 1.3], [1.0, 1.1], [1.1, 1.2], 3)))
+
+
+def test_bollinger_batch(prices):
+    mean, std, _ = reference_std(prices, WINDOW, 0)
+    expected = (mean, mean + 2.0 * std, mean - 2.0 * std)
+    indicator = Indicators.Bollinger(WINDOW)
+    updates = np.array([indicator.update(value) for value in prices]).T
+
+    for actual, reference in zip(Indicators.bollinger_batch(prices, WINDOW), expected):
+        np.testing.assert_allclose(actual, reference, rtol=1e-7)
+    for actual, reference in zip(updates, expected):
+        np.testing.assert_allclose(actual, reference, rtol=1e-7)
+
+
+@pytest.mark.parametrize("batch,indicator,reference", [
+    (Indicators.rolling_max_batch, Indicators.RollingMax, max),
+    (Indicators.rolling_min_batch, Indicators.RollingMin, min),
+])
+def test_rolling_extreme_batch(prices, batch, indicator, reference):
+    expected = np.array([np.nan if w is None else reference(w) for w in windows(prices, WINDOW)])
+
+    np.testing.assert_array_equal(batch(prices, WINDOW), expected)
+    np.testing.assert_array_equal(incremental(indicator(WINDOW), prices), expected)
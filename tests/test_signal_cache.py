@@ -0,0 +1,39 @@
+import os
+import shutil
+
+from Backtest.SignalCache import SignalCache
+from Strategies.SMACrossoverStrategy import MovingAverageCrossStrategy
+
+PARAMS = {"short_window": 10, "long_window": 60}
+
+
+def write_ticks(csv_dir):
+    os.makedirs(csv_dir)
+    path = os.path.join(csv_dir, "GBPUSD_20140101.csv")
+    with open(path, "w") as f:
+        f.write("Time,Ask,Bid,AskVolume,BidVolume\n01.01.2014 00:00:00.000,1.65010,1.65000,1,1\n")
+    return path
+
+
+def test_key_depends_on_the_tick_files(tmp_path):
+    csv_dir = str(tmp_path / "ticks")
+    path = write_ticks(csv_dir)
+    key = SignalCache.key(csv_dir, ["GBPUSD"], MovingAverageCrossStrategy, PARAMS)
+
+    assert SignalCache.key(csv_dir, ["GBPUSD"], MovingAverageCrossStrategy, PARAMS) == key
+    assert SignalCache.key(csv_dir, ["GBPUSD"], MovingAverageCrossStrategy, {"short_window": 5}) != key
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert SignalCache.key(csv_dir, ["GBPUSD"], MovingAverageCrossStrategy, PARAMS) != key
+
+
+def test_copied_tick_files_have_their_own_key(tmp_path):
+    csv_dir = str(tmp_path / "ticks")
+    path = write_ticks(csv_dir)
+    copy_dir = str(tmp_path / "copy")
+    os.makedirs(copy_dir)
+    # The copy has the same name, size and modification time
+    shutil.copy2(path, copy_dir)
+
+    assert SignalCache.key(csv_dir, ["GBPUSD"], MovingAverageCrossStrategy, PARAMS) != \
+        SignalCache.key(copy_dir, ["GBPUSD"], MovingAverageCrossStrategy, PARAMS)
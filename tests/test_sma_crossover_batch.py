@@ -0,0 +1,73 @@
+import queue
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from Events.TickEvent import TickEvent
+from Strategies.SMACrossoverStrategy import MovingAverageCrossStrategy
+
+
+def event_signals(prices, short_window, long_window):
+    """
+    The (tick index, side) of each signal calculate_signals emits
+    when the prices are streamed to it as ticks.
+    """
+    events = queue.Queue()
+    strategy = MovingAverageCrossStrategy(["GBPUSD"], events, short_window, long_window)
+    signals = []
+    for i, price in enumerate(prices):
+        strategy.calculate_signals(TickEvent("GBPUSD", None, price, price))
+        while not events.empty():
+            signals.append((i, events.get().side))
+    return signals
+
+
+def batch_signals(prices, short_window, long_window):
+    strategy = MovingAverageCrossStrategy(["GBPUSD"], queue.Queue(), short_window, long_window)
+    indices, sides = strategy.calculate_signals_batch(prices)
+    return list(zip(indices.tolist(), sides.tolist()))
+
+
+def quantized_prices(rng, n, tick="0.0001", levels=None):
+    """
+    Prices on a grid of the given tick size, either drawn from a few
+    levels or a walk that mostly stands still, so that the two SMAs
+    are often equal or nearly so.
+    """
+    if levels:
+        ticks = rng.randint(0, levels, size=n)
+    else:
+        steps = rng.choice([-1, 0, 0, 0, 1], size=n)
+        steps[0] = 0
+        ticks = 15000 + np.cumsum(steps)
+    return [1 + int(t) * Decimal(tick) for t in ticks]
+
+
+@pytest.mark.parametrize("tick", ["1", "0.25", "0.0001"])
+@pytest.mark.parametrize("short_window,long_window", [(1, 3), (2, 5), (3, 6), (5, 20)])
+def test_batch_matches_event_path_on_tied_prices(tick, short_window, long_window):
+    rng = np.random.RandomState(short_window * 100 + long_window)
+    for _ in range(300):
+        prices = quantized_prices(rng, int(rng.randint(2, 30)), tick, levels=4)
+        assert batch_signals(prices, short_window, long_window) == \
+            event_signals(prices, short_window, long_window)
+
+
+def test_batch_matches_event_path_over_a_long_walk():
+    prices = quantized_prices(np.random.RandomState(11), 5000)
+    signals = event_signals(prices, 10, 40)
+
+    assert len(signals) > 20
+    assert batch_signals(prices, 10, 40) == signals
+
+
+def test_batch_of_no_prices_has_no_signals():
+    assert batch_signals([], 3, 6) == []
+
+
+def test_equal_smas_do_not_cross():
+    # Both SMAs are exactly 2 at tick 2, which float64 does not give
+    prices = [Decimal(p) for p in (1, 4, 2, 1, 1, 4, 4)]
+
+    assert batch_signals(prices, 1, 3) == event_signals(prices, 1, 3) == [(5, "buy")]